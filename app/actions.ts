@@ -19,6 +19,20 @@ export const getJobStatus = async (jobId: string) => {
   return data;
 };
 
+export const cancelJob = async (jobId: string): Promise<boolean> => {
+  const endpoint = `https://mango.sievedata.com/v2/jobs/${jobId}/cancel`;
+  if (!api_key) return false;
+
+  const response = await fetch(endpoint, {
+    method: "POST",
+    headers: { "X-API-Key": api_key },
+  });
+  if (!response.ok) {
+    console.error("Could not cancel job", jobId, await response.text());
+  }
+  return response.ok;
+};
+
 export const submitVideo = async (
   videoUrl: string,
   mode: string
@@ -1,12 +1,12 @@
 "use client";
 import { Button } from "@/components/ui/button";
 import { Input } from "@/components/ui/input";
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import PurpleGradientBackground from "@/components/gradient-background";
 import { Skeleton } from "@/components/ui/skeleton";
 import { Spinner } from "@/components/ui/spinner";
 import MuxVideo from "@mux/mux-video-react";
-import { getJobStatus, submitVideo, isolateGuest } from "./actions";
+import { cancelJob, getJobStatus, submitVideo, isolateGuest } from "./actions";
 import { WavesBackground } from "@/components/waves-background";
 import YouTubeSegmentPlayer from "@/components/yt-player";
 import YouTubeConcatenatedPlayer from "@/components/yt-player";
@@ -36,6 +36,9 @@ const pollJobStatus = async (jobId: string): Promise<any[] | undefined> => {
         } else if (data.status === "error") {
           console.error("Job failed:", data);
           return;
+        } else if (data.status === "cancelled") {
+          console.log("Job cancelled:", jobId);
+          return;
         }
 
         // Wait 5 seconds before polling again
@@ -52,7 +55,8 @@ const pollJobStatus = async (jobId: string): Promise<any[] | undefined> => {
 
 const fetchVideo = async (
   videoUrl: string,
-  mode: string
+  mode: string,
+  onJob?: (jobId: string) => void
 ): Promise<any[] | undefined> => {
   console.log("fetching video...");
   let jobId;
@@ -62,6 +66,7 @@ const fetchVideo = async (
     jobId = await submitVideo(videoUrl, mode);
   }
   if (!jobId) return;
+  onJob?.(jobId);
   return await pollJobStatus(jobId);
 };
 
@@ -82,6 +87,8 @@ export default function Home() {
   const [excludedSpeakers, setExcludedSpeakers] = useState<string[]>([]);
   const [processingStartTime, setProcessingStartTime] = useState<number>(0);
   const [processingCost, setProcessingCost] = useState<number>(0);
+  // Sieve job still running for this page; cancelled when it is abandoned
+  const activeJob = useRef<string | null>(null);
 
   // Convex hooks
   const saveVideo = useMutation(api.videos.saveProcessedVideo);
@@ -104,6 +111,25 @@ export default function Home() {
     }
   }, []);
 
+  // Leaving the page (or navigating away) stops the job instead of letting it run on
+  useEffect(() => {
+    const abandon = () => {
+      if (activeJob.current) cancelJob(activeJob.current);
+      activeJob.current = null;
+    };
+    window.addEventListener("pagehide", abandon);
+    return () => {
+      window.removeEventListener("pagehide", abandon);
+      abandon();
+    };
+  }, []);
+
+  const cancelProcessing = async () => {
+    const jobId = activeJob.current;
+    activeJob.current = null;
+    if (jobId) await cancelJob(jobId);
+  };
+
   const demoVideos = [
     {
       before: "https://www.youtube.com/embed/Qc_kEyLsXH0",
@@ -193,7 +219,10 @@ export default function Home() {
     setLoading(true);
     setProcessingStartTime(Date.now());
     
-    const result = await fetchVideo(videoUrl, mode);
+    const result = await fetchVideo(videoUrl, mode, (jobId) => {
+      activeJob.current = jobId;
+    });
+    activeJob.current = null;
     if (result) {
       console.log("result", result);
       
@@ -331,6 +360,13 @@ export default function Home() {
                   </span>
                 </Skeleton>
               </div>
+              <Button
+                variant="outline"
+                className="cursor-pointer"
+                onClick={() => cancelProcessing()}
+              >
+                Cancel
+              </Button>
             </div>
           )}
         </div>
@@ -0,0 +1,150 @@
+import itertools
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, List
+
+from cancellation import Cancelled, CancelToken
+
+INTERACTIVE = 0
+BATCH = 1
+
+
+class _Waiter:
+    def __init__(self, job: str, priority: int, tokens: int, seq: int):
+        self.job = job
+        self.priority = priority
+        self.tokens = tokens
+        self.seq = seq
+        self.granted = False
+
+
+class AdmissionScheduler:
+    """
+    Process-wide gate in front of every model call made by `run_chunks`.
+
+    At most `max_calls` calls and `max_tokens` estimated tokens (0: no
+    token cap) are in flight at once. When a slot frees up it goes to the
+    waiting call with the best priority class (INTERACTIVE before BATCH);
+    within a class, to the job with the fewest calls in flight, then
+    first come first served — so one large job can't crowd out the rest.
+    A call bigger than the token cap is still admitted when nothing else
+    is running, rather than waiting forever.
+    """
+
+    def __init__(self, max_calls: int = 64, max_tokens: int = 0):
+        self.max_calls = max_calls
+        self.max_tokens = max_tokens
+        self._cond = threading.Condition()
+        self._waiting: List[_Waiter] = []
+        self._seq = itertools.count()
+        self.calls = 0
+        self.tokens = 0
+        self.by_job: Dict[str, int] = {}
+
+    def configure(self, max_calls: int | None = None, max_tokens: int | None = None) -> None:
+        with self._cond:
+            if max_calls is not None:
+                self.max_calls = max_calls
+            if max_tokens is not None:
+                self.max_tokens = max_tokens
+            self._dispatch()
+
+    def _fits(self, waiter: _Waiter) -> bool:
+        if self.calls == 0:
+            return True
+        if self.calls >= self.max_calls:
+            return False
+        return not self.max_tokens or self.tokens + waiter.tokens <= self.max_tokens
+
+    def _dispatch(self) -> None:
+        granted = False
+        while self._waiting:
+            best = min(
+                self._waiting,
+                key=lambda w: (w.priority, self.by_job.get(w.job, 0), w.seq),
+            )
+            if not self._fits(best):
+                break  # no overtaking: a big request must not starve
+            self._waiting.remove(best)
+            best.granted = True
+            self.calls += 1
+            self.tokens += best.tokens
+            self.by_job[best.job] = self.by_job.get(best.job, 0) + 1
+            granted = True
+        if granted:
+            self._cond.notify_all()
+
+    def acquire(
+        self,
+        job: str,
+        priority: int = INTERACTIVE,
+        tokens: int = 0,
+        cancel: CancelToken | None = None,
+    ) -> None:
+        """Block until admitted; raises `Cancelled` if `cancel` fires first."""
+        with self._cond:
+            waiter = _Waiter(job, priority, tokens, next(self._seq))
+            self._waiting.append(waiter)
+            self._dispatch()
+            while not waiter.granted:
+                if cancel is not None and cancel.cancelled:
+                    self._waiting.remove(waiter)
+                    self._dispatch()
+                    raise Cancelled(cancel.reason)
+                self._cond.wait(timeout=0.2)
+
+    def release(self, job: str, tokens: int = 0) -> None:
+        with self._cond:
+            self.calls -= 1
+            self.tokens -= tokens
+            left = self.by_job.get(job, 1) - 1
+            if left:
+                self.by_job[job] = left
+            else:
+                self.by_job.pop(job, None)
+            self._dispatch()
+
+    def job(self, key: str, priority: int = INTERACTIVE) -> "JobAdmission":
+        return JobAdmission(self, key, priority)
+
+
+class JobAdmission:
+    """One job's handle on the scheduler: its key and priority class."""
+
+    def __init__(self, scheduler: AdmissionScheduler, key: str, priority: int):
+        self.scheduler = scheduler
+        self.key = key
+        self.priority = priority
+
+    @contextmanager
+    def slot(self, tokens: int = 0, cancel: CancelToken | None = None):
+        self.scheduler.acquire(self.key, self.priority, tokens, cancel)
+        try:
+            yield
+        finally:
+            self.scheduler.release(self.key, tokens)
+
+
+def estimate_tokens(*texts: str) -> int:
+    """Rough token count (~4 characters per token) for admission accounting."""
+    return sum(len(text) for text in texts) // 4
+
+
+_scheduler: AdmissionScheduler | None = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> AdmissionScheduler:
+    """
+    Process-wide scheduler capped by TLDR_MAX_INFLIGHT_CALLS (default 64)
+    and TLDR_MAX_INFLIGHT_TOKENS (default 0, no token cap).
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = AdmissionScheduler(
+                int(os.getenv("TLDR_MAX_INFLIGHT_CALLS", "64")),
+                int(os.getenv("TLDR_MAX_INFLIGHT_TOKENS", "0")),
+            )
+        return _scheduler
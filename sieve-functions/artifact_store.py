@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+# artifact kinds shared by the Sieve functions
+JSON3 = "json3"  # YouTube json3 transcript
+WAV = "wav"  # diarization audio
+METADATA = "metadata"  # {"title": ..., "duration": ...}
+SPEECH_WAV = "speech_wav"  # 16 kHz mono, non-speech removed
+SPEECH_SPANS = "speech_spans"  # kept spans of the original timeline
+
+DEFAULT_ROOT = Path.home() / ".cache" / "tldr-tube" / "artifacts"
+DEFAULT_MAX_BYTES = 5 * 1024**3
+EVICT_GRACE_S = 600.0
+
+
+def atomic_write(target: Path, write) -> None:
+    """Call `write(fh)` on a temp file next to `target`, then rename it into place."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            write(fh)
+        os.replace(tmp, target)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+class ArtifactStore:
+    """
+    Content-addressed on-disk store for per-video artifacts.
+
+    Blobs live under `blobs/<sha256>` and are shared by every reference with
+    the same content; `refs/<video_id>/<kind>` holds the digest a
+    (video, kind) pair points at. All writes go through a temp file and
+    `os.replace`, so a crashed or concurrent writer never leaves a partial
+    artifact behind. Once the blobs exceed `max_bytes` the least recently
+    used ones (by mtime, refreshed on every hit) are evicted — except blobs
+    used within the last `EVICT_GRACE_S`, so a path handed out by `get` or
+    `put_file` stays readable while its caller works with it (the cap may
+    be exceeded meanwhile). Readers still treat a vanished blob as a miss.
+    """
+
+    def __init__(self, root: str | Path = DEFAULT_ROOT, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        (self.root / "blobs").mkdir(parents=True, exist_ok=True)
+        (self.root / "refs").mkdir(parents=True, exist_ok=True)
+
+    # ────────── lookups ──────────
+    def _ref_path(self, video_id: str, kind: str) -> Path:
+        return self.root / "refs" / video_id / kind
+
+    def get(self, video_id: str, kind: str) -> Path | None:
+        """Return the stored blob path for (video_id, kind), or None."""
+        ref = self._ref_path(video_id, kind)
+        try:
+            digest, suffix = ref.read_text().split(":", 1)
+        except (FileNotFoundError, ValueError):
+            return None
+        blob = self.root / "blobs" / f"{digest}{suffix}"
+        try:
+            os.utime(blob)  # mark as recently used
+        except FileNotFoundError:  # evicted
+            return None
+        return blob
+
+    def get_json(self, video_id: str, kind: str) -> Any | None:
+        path = self.get(video_id, kind)
+        try:
+            return json.loads(path.read_text(encoding="utf-8")) if path else None
+        except FileNotFoundError:  # evicted since `get`
+            return None
+
+    # ────────── writes ──────────
+    def put_file(self, video_id: str, kind: str, src: str | Path) -> Path:
+        """Copy `src` into the store and point (video_id, kind) at it."""
+        src = Path(src)
+        sha = hashlib.sha256()
+        with src.open("rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                sha.update(block)
+        digest, suffix = sha.hexdigest(), src.suffix
+
+        blob = self.root / "blobs" / f"{digest}{suffix}"
+        if not blob.exists():
+
+            def _copy(out):
+                with src.open("rb") as fh:
+                    shutil.copyfileobj(fh, out, 1 << 20)
+
+            atomic_write(blob, _copy)
+        else:
+            os.utime(blob)
+
+        ref = self._ref_path(video_id, kind)
+        atomic_write(ref, lambda out: out.write(f"{digest}:{suffix}".encode()))
+        self.evict(keep=blob)
+        return blob
+
+    def put_bytes(self, video_id: str, kind: str, data: bytes, suffix: str = "") -> Path:
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+            tmp.write(data)
+        try:
+            return self.put_file(video_id, kind, tmp.name)
+        finally:
+            Path(tmp.name).unlink(missing_ok=True)
+
+    def put_json(self, video_id: str, kind: str, value: Any) -> Path:
+        return self.put_bytes(video_id, kind, json.dumps(value).encode("utf-8"), ".json")
+
+    # ────────── eviction ──────────
+    def evict(self, keep: Path | None = None) -> int:
+        """
+        Drop least recently used blobs until under `max_bytes`; return bytes
+        freed. `keep` (the blob just written) and blobs used within
+        `EVICT_GRACE_S` are never dropped.
+        """
+        cutoff = time.time() - EVICT_GRACE_S
+        with self._lock:
+            blobs = []
+            for path in (self.root / "blobs").iterdir():
+                if path.name.startswith(".tmp-"):
+                    continue
+                try:
+                    st = path.stat()
+                except FileNotFoundError:
+                    continue
+                blobs.append((st.st_mtime, st.st_size, path))
+
+            total = sum(size for _, size, _ in blobs)
+            freed = 0
+            for mtime, size, path in sorted(blobs):
+                if total - freed <= self.max_bytes or mtime >= cutoff:
+                    break  # sorted by mtime: everything after is recent too
+                if path == keep:
+                    continue
+                try:
+                    if path.stat().st_mtime >= cutoff:  # hit by a concurrent `get`
+                        continue
+                except FileNotFoundError:
+                    continue
+                path.unlink(missing_ok=True)
+                freed += size
+            # dangling refs are ignored by `get` and overwritten on the next put
+            return freed
+
+
+_store: ArtifactStore | None = None
+
+
+def get_artifact_store() -> ArtifactStore:
+    """Process-wide store, configured by TLDR_ARTIFACT_DIR / TLDR_ARTIFACT_MAX_BYTES."""
+    global _store
+    if _store is None:
+        _store = ArtifactStore(
+            os.getenv("TLDR_ARTIFACT_DIR", str(DEFAULT_ROOT)),
+            int(os.getenv("TLDR_ARTIFACT_MAX_BYTES", DEFAULT_MAX_BYTES)),
+        )
+    return _store
@@ -0,0 +1,217 @@
+import bisect
+import re
+import subprocess
+import tempfile
+import wave
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+Span = Tuple[float, float]
+
+_SILENCE_START = re.compile(r"silence_start:\s*(-?[\d.]+)")
+_SILENCE_END = re.compile(r"silence_end:\s*(-?[\d.]+)")
+
+
+class TimelineMap:
+    """
+    Maps times on the trimmed (speech-only) audio back to the original
+    timeline. `spans` are the kept (start, end) ranges of the original audio,
+    in order; in the trimmed file they are laid end to end.
+    """
+
+    def __init__(self, spans: List[Span]):
+        self.spans = spans
+        self._offsets: List[float] = []  # trimmed-time start of each span
+        t = 0.0
+        for start, end in spans:
+            self._offsets.append(t)
+            t += end - start
+        self.duration = t
+
+    def to_original(self, t: float) -> float:
+        if not self.spans:
+            return t
+        i = max(0, bisect.bisect_right(self._offsets, t) - 1)
+        start, end = self.spans[i]
+        return min(start + (t - self._offsets[i]), end)
+
+    def to_trimmed(self, t: float) -> float:
+        """Inverse of `to_original` for times inside a kept span (clamped otherwise)."""
+        if not self.spans:
+            return t
+        i = max(0, bisect.bisect_right(self.spans, (t, float("inf"))) - 1)
+        start, end = self.spans[i]
+        return self._offsets[i] + min(max(t - start, 0.0), end - start)
+
+    def map_interval(self, start: float, end: float) -> List[Span]:
+        """
+        Map a trimmed-timeline interval to original-timeline intervals,
+        split wherever it crosses a removed (non-speech) gap.
+        """
+        if not self.spans:
+            return [(start, end)]
+        out: List[Span] = []
+        i = max(0, bisect.bisect_right(self._offsets, start) - 1)
+        while i < len(self.spans) and self._offsets[i] < end:
+            span_start, span_end = self.spans[i]
+            lo = max(start, self._offsets[i]) - self._offsets[i] + span_start
+            hi = min(end, self._offsets[i] + span_end - span_start) - self._offsets[i] + span_start
+            if hi > lo:
+                out.append((lo, hi))
+            i += 1
+        return out
+
+    def to_json(self) -> List[List[float]]:
+        return [[s, e] for s, e in self.spans]
+
+    @classmethod
+    def from_json(cls, spans: List[List[float]]) -> "TimelineMap":
+        return cls([(float(s), float(e)) for s, e in spans])
+
+
+def _run_ffmpeg(args: List[str]) -> str:
+    proc = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-nostdin", *args],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {proc.stderr[-2000:]}")
+    return proc.stderr
+
+
+def resample_mono_16k(src: str, dst: str) -> str:
+    """Downmix + resample to 16 kHz mono 16-bit PCM WAV (what pyannote uses anyway)."""
+    _run_ffmpeg(["-y", "-i", src, "-ac", "1", "-ar", "16000", "-c:a", "pcm_s16le", dst])
+    return dst
+
+
+def wav_duration(path: str) -> float:
+    with wave.open(path, "rb") as wav:
+        return wav.getnframes() / float(wav.getframerate())
+
+
+def detect_speech_spans(
+    path: str,
+    *,
+    noise_db: float = -35.0,
+    min_silence_s: float = 0.7,
+    pad_s: float = 0.2,
+) -> List[Span]:
+    """
+    Energy-based VAD via ffmpeg's `silencedetect`: everything that is not a
+    silence of at least `min_silence_s` below `noise_db` counts as speech.
+    Spans are padded by `pad_s` on both sides and merged where they touch.
+    """
+    duration = wav_duration(path)
+    stderr = _run_ffmpeg(
+        ["-i", path, "-af", f"silencedetect=noise={noise_db}dB:d={min_silence_s}", "-f", "null", "-"]
+    )
+
+    silences: List[Span] = []
+    silence_start: float | None = None
+    for line in stderr.splitlines():
+        m = _SILENCE_START.search(line)
+        if m:
+            silence_start = max(0.0, float(m.group(1)))
+            continue
+        m = _SILENCE_END.search(line)
+        if m and silence_start is not None:
+            silences.append((silence_start, float(m.group(1))))
+            silence_start = None
+    if silence_start is not None:  # trailing silence runs to EOF
+        silences.append((silence_start, duration))
+
+    spans: List[Span] = []
+    cursor = 0.0
+    for s_start, s_end in silences:
+        if s_start > cursor:
+            spans.append((cursor, s_start))
+        cursor = max(cursor, s_end)
+    if cursor < duration:
+        spans.append((cursor, duration))
+
+    padded: List[Span] = []
+    for start, end in spans:
+        start, end = max(0.0, start - pad_s), min(duration, end + pad_s)
+        if padded and start <= padded[-1][1]:
+            padded[-1] = (padded[-1][0], max(padded[-1][1], end))
+        else:
+            padded.append((start, end))
+    return padded
+
+
+def cut_to_spans(src: str, dst: str, spans: List[Span]) -> Tuple[str, List[Span]]:
+    """
+    Write only `spans` of the PCM WAV `src`, back to back, to `dst`.
+
+    Cuts are exact sample ranges (ffmpeg's `aselect` works on whole decoded
+    frames, which drifts over hundreds of spans). Returns `dst` and the
+    spans actually written, snapped to sample boundaries, so a
+    `TimelineMap` built from them matches the file exactly.
+    """
+    written: List[Span] = []
+    with wave.open(src, "rb") as reader, wave.open(dst, "wb") as writer:
+        rate = reader.getframerate()
+        total = reader.getnframes()
+        writer.setparams(reader.getparams())
+        for start, end in spans:
+            first = min(max(round(start * rate), 0), total)
+            last = min(max(round(end * rate), first), total)
+            if last == first:
+                continue
+            reader.setpos(first)
+            writer.writeframes(reader.readframes(last - first))
+            written.append((first / rate, last / rate))
+    return dst, written
+
+
+def subtract_spans(spans: List[Span], cuts: Sequence[Span]) -> List[Span]:
+    """`spans` with every `cuts` interval removed (both sorted, non-overlapping)."""
+    out: List[Span] = []
+    for start, end in spans:
+        for cut_start, cut_end in cuts:
+            if cut_end <= start or cut_start >= end:
+                continue
+            if cut_start > start:
+                out.append((start, cut_start))
+            start = max(start, cut_end)
+            if start >= end:
+                break
+        if start < end:
+            out.append((start, end))
+    return out
+
+
+def preprocess_for_diarization(
+    src: str,
+    workdir: str | None = None,
+    *,
+    skip_before_s: float = 0.0,
+    skip: Sequence[Span] = (),
+) -> Tuple[str, TimelineMap]:
+    """
+    Resample `src` to 16 kHz mono, drop non-speech spans (and everything
+    before `skip_before_s`, e.g. a known host-only intro, and inside the
+    `skip` spans, e.g. sponsor reads) and return the trimmed WAV path plus
+    the map back to the original timeline.
+    """
+    workdir = Path(workdir or tempfile.mkdtemp(prefix="diarize-"))
+    resampled = resample_mono_16k(src, str(workdir / "mono16k.wav"))
+    duration = wav_duration(resampled)
+    spans = [
+        (max(start, skip_before_s), end)
+        for start, end in detect_speech_spans(resampled)
+        if end > skip_before_s
+    ]
+    spans = subtract_spans(spans, skip)
+    if not spans:  # all silence: let diarization see the whole thing
+        spans = [(0.0, duration)]
+
+    kept = sum(e - s for s, e in spans)
+    print(
+        f"VAD kept {kept:.1f}s of {duration:.1f}s audio "
+        f"({100 * kept / max(duration, 1e-9):.0f}%) in {len(spans)} spans"
+    )
+    trimmed, written = cut_to_spans(resampled, str(workdir / "speech.wav"), spans)
+    return trimmed, TimelineMap(written)
@@ -0,0 +1,162 @@
+"""
+Re-run the TL;DR pipeline over many videos locally, for throughput.
+
+    python batch_reprocess.py -f urls.txt --mode fast --jobs 8 --llm-concurrency 40
+
+URLs come from the command line and/or files (one per line, `#` comments).
+Videos are fed through a bounded queue to `--jobs` workers; all of their
+model calls share `--llm-concurrency` slots of the admission scheduler at
+BATCH priority, so the quota stays saturated without per-video fan-out
+piling up and interactive jobs in the same process still go first. Each
+finished video is written to `<out>/<video_id>-<mode>-<level>.json` and
+skipped on the next run (use `--force` to redo); a video interrupted
+mid-way resumes from its pipeline checkpoint. Failures go to `<out>/failed.jsonl` and are retried next run.
+Re-uploads and clips of already processed videos reuse their results via
+the fingerprint index (only results of the current prompts and models).
+"""
+
+import argparse
+import json
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, List
+
+from admission import BATCH, get_scheduler
+from artifact_store import atomic_write
+from create_video import run_tldr_pipeline
+from get_subtitles import get_youtube_video_id
+
+DEFAULT_OUT = Path("batch-results")
+_STOP = object()
+
+
+def read_urls(urls: List[str], files: List[str]) -> Iterator[str]:
+    yield from urls
+    for name in files:
+        with open(name, encoding="utf-8") as fh:
+            for line in fh:
+                line = line.split("#", 1)[0].strip()
+                if line:
+                    yield line
+
+
+def result_path(out: Path, url: str, mode: str, adhd_level: str) -> Path:
+    video_id = get_youtube_video_id(url) or url.replace("/", "_")
+    return out / f"{video_id}-{mode}-{adhd_level}.json"
+
+
+class BatchRun:
+    """Worker pool draining a bounded URL queue into the results directory."""
+
+    def __init__(
+        self, out: Path, mode: str, adhd_level: str, jobs: int, force: bool, reuse: bool = True
+    ):
+        self.out = out
+        self.mode = mode
+        self.adhd_level = adhd_level
+        self.jobs = jobs
+        self.force = force
+        self.reuse = reuse
+        self.queue: queue.Queue = queue.Queue(maxsize=jobs * 2)
+        self.lock = threading.Lock()
+        self.counts = {"done": 0, "skipped": 0, "failed": 0}
+
+    def _record_failure(self, url: str, error: BaseException) -> None:
+        line = json.dumps({"url": url, "error": repr(error), "at": time.time()})
+        with self.lock, open(self.out / "failed.jsonl", "a", encoding="utf-8") as fh:
+            fh.write(line + "\n")
+
+    def _process(self, url: str) -> None:
+        target = result_path(self.out, url, self.mode, self.adhd_level)
+        if target.exists() and not self.force:
+            with self.lock:
+                self.counts["skipped"] += 1
+            return
+        started = time.monotonic()
+        try:
+            segments = run_tldr_pipeline(
+                url, self.mode, self.adhd_level, priority=BATCH, reuse_duplicates=self.reuse
+            )
+        except Exception as e:
+            print(f"[batch] FAILED {url}: {e!r}")
+            self._record_failure(url, e)
+            with self.lock:
+                self.counts["failed"] += 1
+            return
+        data = json.dumps(
+            {
+                "url": url,
+                "mode": self.mode,
+                "adhd_level": self.adhd_level,
+                "segments": segments,
+                "elapsed_s": time.monotonic() - started,
+                "finished_at": time.time(),
+            }
+        ).encode("utf-8")
+        atomic_write(target, lambda fh: fh.write(data))
+        with self.lock:
+            self.counts["done"] += 1
+            done = self.counts["done"]
+        print(f"[batch] done {url} in {time.monotonic() - started:.1f}s ({done} so far)")
+
+    def _worker(self) -> None:
+        while True:
+            url = self.queue.get()
+            if url is _STOP:
+                return
+            self._process(url)
+
+    def run(self, urls: Iterator[str]) -> dict:
+        self.out.mkdir(parents=True, exist_ok=True)
+        workers = [
+            threading.Thread(target=self._worker, daemon=True) for _ in range(self.jobs)
+        ]
+        for worker in workers:
+            worker.start()
+        for url in urls:
+            self.queue.put(url)  # blocks while the queue is full
+        for _ in workers:
+            self.queue.put(_STOP)
+        for worker in workers:
+            worker.join()
+        return self.counts
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("urls", nargs="*", help="YouTube URLs")
+    parser.add_argument("-f", "--file", action="append", default=[], help="file of URLs")
+    parser.add_argument("--mode", choices=["fast", "quality"], default="fast")
+    parser.add_argument(
+        "--adhd-level", choices=["relaxed", "normal", "hyper"], default="normal"
+    )
+    parser.add_argument("--out", type=Path, default=DEFAULT_OUT, help="results directory")
+    parser.add_argument("--jobs", type=int, default=4, help="videos processed at once")
+    parser.add_argument(
+        "--llm-concurrency", type=int, default=32, help="model calls in flight, all videos"
+    )
+    parser.add_argument("--force", action="store_true", help="redo finished videos")
+    parser.add_argument(
+        "--no-reuse", action="store_true", help="don't reuse results of duplicate transcripts"
+    )
+    args = parser.parse_args(argv)
+
+    get_scheduler().configure(max_calls=args.llm_concurrency)
+    started = time.monotonic()
+    batch = BatchRun(
+        args.out, args.mode, args.adhd_level, args.jobs, args.force, reuse=not args.no_reuse
+    )
+    counts = batch.run(read_urls(args.urls, args.file))
+    elapsed = time.monotonic() - started
+    print(
+        f"[batch] {counts['done']} done, {counts['skipped']} skipped, "
+        f"{counts['failed']} failed in {elapsed:.0f}s "
+        f"({60 * counts['done'] / max(elapsed, 1e-9):.1f} videos/min)"
+    )
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,114 @@
+"""
+Caption parsing throughput on synthetic multi-hour transcripts.
+
+    python bench_captions.py --hours 4 --runs 5
+
+Generates json3 (word-level), WebVTT and SRT tracks of the given length,
+parses each with `captions.parse_captions` (format autodetected) and
+reports cues/sec and MB/s. If `webvtt-py` is installed, its reader is
+timed on the same VTT file for comparison.
+"""
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from captions import parse_captions
+
+_WORDS = "so the key point here is that we measure what matters and ship it".split()
+
+
+def _stamp(t: float, sep: str) -> str:
+    ms = int(round(t * 1000))
+    h, ms = divmod(ms, 3_600_000)
+    m, ms = divmod(ms, 60_000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d}{sep}{ms:03d}"
+
+
+def make_json3(hours: float, word_s: float = 0.4) -> str:
+    n_words = int(hours * 3600 / word_s)
+    events = []
+    for first in range(0, n_words, 10):
+        count = min(10, n_words - first)
+        events.append(
+            {
+                "tStartMs": int(first * word_s * 1000),
+                "dDurationMs": int(count * word_s * 1000),
+                "segs": [
+                    {
+                        "utf8": " " + _WORDS[(first + i) % len(_WORDS)],
+                        "tOffsetMs": int(i * word_s * 1000),
+                    }
+                    for i in range(count)
+                ],
+            }
+        )
+    return json.dumps({"events": events})
+
+
+def make_timed_text(hours: float, srt: bool, cue_s: float = 3.0) -> str:
+    sep = "," if srt else "."
+    out = [] if srt else ["WEBVTT", ""]
+    for i in range(int(hours * 3600 / cue_s)):
+        start = i * cue_s
+        out.append(str(i + 1))
+        out.append(f"{_stamp(start, sep)} --> {_stamp(start + cue_s, sep)}")
+        out.append(" ".join(_WORDS[i % 5 : i % 5 + 7]))
+        out.append("<i>" + " ".join(_WORDS[:5]) + "</i>")
+        out.append("")
+    return "\n".join(out)
+
+
+def bench(name: str, size: int, parse: Callable[[], int], runs: int) -> None:
+    times: List[float] = []
+    count = 0
+    for _ in range(runs):
+        started = time.perf_counter()
+        count = parse()
+        times.append(time.perf_counter() - started)
+    best = min(times)
+    print(
+        f"{name:<14} {count:>8} cues  median {statistics.median(times) * 1e3:8.1f} ms  "
+        f"{count / best:>12,.0f} cues/s  {size / best / 2**20:7.1f} MB/s"
+    )
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hours", type=float, default=3.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    tracks = {
+        "json3": make_json3(args.hours),
+        "vtt": make_timed_text(args.hours, srt=False),
+        "srt": make_timed_text(args.hours, srt=True),
+    }
+    print(f"{args.hours:g} h of captions, best of {args.runs} runs for cues/s")
+    for name, text in tracks.items():
+        bench(name, len(text), lambda text=text: len(parse_captions(text)), args.runs)
+
+    try:
+        import webvtt
+    except ImportError:
+        print("webvtt-py not installed, skipping comparison")
+        return 0
+
+    def _webvtt(path: Path) -> int:
+        caps = webvtt.read(str(path))
+        return len([(c.text, c.start_in_seconds, c.end_in_seconds) for c in caps])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "track.vtt"
+        path.write_text(tracks["vtt"], encoding="utf-8")
+        bench("webvtt-py", len(tracks["vtt"]), lambda: _webvtt(path), args.runs)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,85 @@
+"""
+Cold-import benchmark for the Sieve entry modules.
+
+    python bench_imports.py                      # create_video, isolate_guest
+    python bench_imports.py create_video --runs 10 --max-ms 400
+
+Each run imports the module in a fresh interpreter (as a Sieve cold start
+does) and reports the median wall time plus the slowest imports from
+`python -X importtime`. With `--max-ms`, exits non-zero if any module's
+median exceeds the budget, so it can guard against import-time regressions.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+HERE = Path(__file__).resolve().parent
+DEFAULT_MODULES = ["create_video", "isolate_guest"]
+_TIMER = "import time; t = time.perf_counter(); import {m}; print((time.perf_counter() - t) * 1e3)"
+
+
+def time_import(module: str) -> float:
+    """Milliseconds to import `module` in a fresh interpreter."""
+    proc = subprocess.run(
+        [sys.executable, "-c", _TIMER.format(m=module)],
+        cwd=HERE,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(proc.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(module: str, top: int = 10) -> List[Tuple[float, str]]:
+    """(cumulative ms, name) of the `top` slowest imports, nested up to one level."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=HERE,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows: List[Tuple[float, str]] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth <= 1:  # `module` and what it imports directly
+            rows.append((int(cumulative) / 1e3, name.rstrip()[1:]))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None, help="fail above this median")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    args = parser.parse_args(argv)
+
+    over_budget = []
+    for module in args.modules:
+        samples = [time_import(module) for _ in range(args.runs)]
+        median = statistics.median(samples)
+        print(
+            f"{module}: median {median:.0f} ms "
+            f"(min {min(samples):.0f}, max {max(samples):.0f}, {args.runs} runs)"
+        )
+        for ms, name in slowest_imports(module, args.top):
+            print(f"  {ms:8.1f} ms  {name}")
+        if args.max_ms is not None and median > args.max_ms:
+            over_budget.append(module)
+
+    if over_budget:
+        print(f"Over the {args.max_ms:.0f} ms budget: {', '.join(over_budget)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
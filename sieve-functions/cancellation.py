@@ -0,0 +1,86 @@
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List
+
+
+class Cancelled(Exception):
+    """Raised when work is abandoned because its job was cancelled."""
+
+
+class CancelToken:
+    """
+    Cooperative cancellation flag shared by every stage of one job.
+
+    Work checks `cancelled` / `raise_if_cancelled()` between units of work;
+    `on_cancel` callbacks let blocking code (downloads, thread pools) be
+    interrupted as soon as `cancel()` is called. If `marker` is given, the
+    token also counts as cancelled once that file exists, so another
+    process can cancel the job by touching it.
+    """
+
+    def __init__(self, marker: str | Path | None = None):
+        self.reason: str | None = None
+        self.marker = Path(marker) if marker else None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        if not self._event.is_set() and self.marker is not None and self.marker.exists():
+            self.cancel("cancel marker found")
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        print(f"Cancelling job: {reason}")
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Cancel callback failed: {e}")
+
+    def on_cancel(self, callback: Callable[[], None]) -> None:
+        """Run `callback` on cancellation (immediately if already cancelled)."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise Cancelled(self.reason)
+
+
+_jobs: Dict[str, CancelToken] = {}
+_jobs_lock = threading.Lock()
+
+
+def register_job(key: str, marker: str | Path | None = None) -> CancelToken:
+    """Token for job `key`, cancellable from elsewhere in the process via `cancel_job`."""
+    with _jobs_lock:
+        token = _jobs.get(key)
+        if token is None:
+            token = _jobs[key] = CancelToken(marker)
+        return token
+
+
+def cancel_job(key: str, reason: str = "cancelled by request") -> bool:
+    """Cancel a running job; returns False if no such job is running here."""
+    with _jobs_lock:
+        token = _jobs.get(key)
+    if token is None:
+        return False
+    token.cancel(reason)
+    return True
+
+
+def release_job(key: str) -> None:
+    with _jobs_lock:
+        _jobs.pop(key, None)
@@ -0,0 +1,181 @@
+import json
+import re
+from array import array
+from pathlib import Path
+from typing import Callable, Iterator, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+_TAG = re.compile(r"<[^>]*>")
+_TIMING = re.compile(
+    r"^\s*((?:\d+:)?\d{1,2}:\d{2}[.,]\d{1,3})\s*-->\s*((?:\d+:)?\d{1,2}:\d{2}[.,]\d{1,3})"
+)
+_ARROW = re.compile(r"\d{1,2}:\d{2}([.,])\d{1,3}\s*-->")
+
+
+class Cues:
+    """
+    Compact caption track: parallel text / start / end columns (seconds)
+    instead of one object per cue. `to_subtitles` builds the per-cue
+    objects the pipeline modules work with.
+    """
+
+    __slots__ = ("texts", "starts", "ends", "_ordered")
+
+    def __init__(self):
+        self.texts: List[str] = []
+        self.starts = array("d")
+        self.ends = array("d")
+        self._ordered = True
+
+    def append(self, text: str, start: float, end: float) -> None:
+        if self.starts and start < self.starts[-1]:
+            self._ordered = False
+        self.texts.append(text)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def sort(self) -> "Cues":
+        """Stable sort by start time (a no-op for tracks that arrive in order)."""
+        if not self._ordered:
+            order = sorted(range(len(self.texts)), key=self.starts.__getitem__)
+            self.texts = [self.texts[i] for i in order]
+            self.starts = array("d", (self.starts[i] for i in order))
+            self.ends = array("d", (self.ends[i] for i in order))
+            self._ordered = True
+        return self
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def __iter__(self) -> Iterator[Tuple[str, float, float]]:
+        return zip(self.texts, self.starts, self.ends)
+
+    def to_subtitles(self, factory: Callable[[str, float, float], T]) -> List[T]:
+        return [factory(text, start, end) for text, start, end in self]
+
+
+def _seconds(stamp: str) -> float:
+    """`[hh:]mm:ss.mmm` (or `,mmm` in SRT) → seconds."""
+    parts = stamp.replace(",", ".").split(":")
+    seconds = float(parts[-1]) + 60 * int(parts[-2])
+    return seconds + 3600 * int(parts[0]) if len(parts) == 3 else seconds
+
+
+def parse_json3(data: dict) -> Cues:
+    """
+    YouTube json3 → word-level cues. A word ends where the next word of its
+    event starts; the last word at the end of the event (or 0.15 s later if
+    the event has no duration).
+    """
+    cues = Cues()
+    for event in data.get("events", []):
+        t_start_ms = event.get("tStartMs")
+        segs = event.get("segs")
+        if t_start_ms is None or segs is None:  # style / window events
+            continue
+        dur_ms = event.get("dDurationMs")
+        last = len(segs) - 1
+        for i, seg in enumerate(segs):
+            word = seg.get("utf8", "").strip()
+            if not word:
+                continue
+            offset_ms = seg.get("tOffsetMs", 0)
+            start = (t_start_ms + offset_ms) / 1000.0
+            if i < last:
+                end = (t_start_ms + segs[i + 1].get("tOffsetMs", offset_ms)) / 1000.0
+            elif dur_ms is not None:
+                end = (t_start_ms + dur_ms) / 1000.0
+            else:
+                end = start + 0.15
+            cues.append(word, start, end)
+    return cues.sort()
+
+
+def parse_timed_text(text: str) -> Cues:
+    """
+    WebVTT or SRT in one pass over the lines: a timing line opens a cue,
+    following lines up to a blank line are its text (tags stripped). Cue
+    numbers/IDs, the WEBVTT header and NOTE/STYLE blocks carry no timing
+    line and are skipped.
+    """
+    cues = Cues()
+    start = end = 0.0
+    lines: List[str] | None = None  # text of the open cue
+    for line in text.splitlines():
+        if lines is None:
+            if "-->" in line:
+                match = _TIMING.match(line)
+                if match:
+                    start, end = _seconds(match.group(1)), _seconds(match.group(2))
+                    lines = []
+            continue
+        if line.strip():
+            lines.append(_TAG.sub("", line) if "<" in line else line)
+            continue
+        cues.append("\n".join(lines), start, end)
+        lines = None
+    if lines is not None:
+        cues.append("\n".join(lines), start, end)
+    return cues.sort()
+
+
+def cues_from_transcript_entries(entries: List[dict]) -> Cues:
+    """YouTubeTranscriptApi entries (`text`, `start`, `duration`) → line-level cues."""
+    cues = Cues()
+    for entry in entries:
+        start = float(entry["start"])
+        cues.append(entry["text"], start, start + float(entry.get("duration", 0.0)))
+    return cues.sort()
+
+
+def split_words(cues: Cues) -> Cues:
+    """
+    Line-level cues → one cue per word. Each word gets a slice of its
+    line's time proportional to its length (interpolated, not measured:
+    use only where no real word timing exists).
+    """
+    words = Cues()
+    for text, start, end in cues:
+        tokens = text.split()
+        if not tokens:
+            continue
+        duration = max(end - start, 0.0)
+        total_chars = sum(len(token) for token in tokens)
+        t = start
+        for token in tokens:
+            word_end = t + duration * len(token) / total_chars
+            words.append(token, t, word_end)
+            t = word_end
+    return words.sort()
+
+
+def detect_format(text: str) -> str:
+    """'json3', 'transcript-api', 'vtt' or 'srt', from the content alone."""
+    head = text[:4096].lstrip("\ufeff \t\r\n")
+    if head.startswith("WEBVTT"):
+        return "vtt"
+    if head.startswith("{"):
+        return "json3"
+    if head.startswith("["):
+        return "transcript-api"
+    match = _ARROW.search(head)
+    if match is None:
+        raise ValueError("Unrecognised caption format")
+    return "srt" if match.group(1) == "," else "vtt"
+
+
+def parse_captions(text: str, fmt: str | None = None) -> Cues:
+    """Parse caption text in `fmt` (autodetected if None)."""
+    fmt = fmt or detect_format(text)
+    if fmt == "json3":
+        return parse_json3(json.loads(text))
+    if fmt == "transcript-api":
+        return cues_from_transcript_entries(json.loads(text))
+    if fmt in ("vtt", "srt"):
+        return parse_timed_text(text)
+    raise ValueError(f"Unknown caption format {fmt!r}")
+
+
+def load_captions(path: str | Path, fmt: str | None = None) -> Cues:
+    return parse_captions(Path(path).read_text(encoding="utf-8-sig"), fmt)
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, List, Set
+
+from artifact_store import atomic_write
+
+DEFAULT_ROOT = Path.home() / ".cache" / "tldr-tube" / "checkpoints"
+DEFAULT_TTL_S = 7 * 24 * 3600  # a job untouched this long is never coming back
+
+_pruned: Set[Path] = set()
+_pruned_lock = threading.Lock()
+
+
+def job_key(*parts: Any) -> str:
+    """Stable key for a job from its (JSON-serialisable) inputs."""
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def _write_json(path: Path, value: Any) -> None:
+    data = json.dumps(value).encode("utf-8")
+    atomic_write(path, lambda fh: fh.write(data))
+
+
+def _read_json(path: Path) -> Any | None:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _last_write(directory: Path) -> float:
+    latest = directory.stat().st_mtime
+    for parent, dirs, files in os.walk(directory):
+        for name in dirs + files:
+            try:
+                latest = max(latest, os.stat(os.path.join(parent, name)).st_mtime)
+            except FileNotFoundError:
+                pass
+    return latest
+
+
+def prune_stale(root: str | Path, ttl_s: float = DEFAULT_TTL_S) -> int:
+    """Remove job directories under `root` with nothing written for `ttl_s`; returns the count."""
+    cutoff = time.time() - ttl_s
+    removed = 0
+    for directory in Path(root).glob("*"):
+        try:
+            if directory.is_dir() and _last_write(directory) < cutoff:
+                shutil.rmtree(directory, ignore_errors=True)
+                removed += 1
+        except FileNotFoundError:  # cleared by its own job meanwhile
+            pass
+    return removed
+
+
+class ChunkCheckpoint:
+    """Per-chunk results of one fan-out stage, one JSON file per chunk."""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+
+    def get(self, chunk: int) -> List[int] | None:
+        return _read_json(self.directory / f"{chunk}.json")
+
+    def put(self, chunk: int, result: List[int]) -> None:
+        _write_json(self.directory / f"{chunk}.json", list(result))
+
+
+class CheckpointStore:
+    """
+    Stage outputs of one job, saved under `<root>/<job_key>/` so a retried
+    job can resume from the last completed stage.
+
+    Stages are plain JSON values; fan-out stages get a `ChunkCheckpoint` so
+    only chunks that never finished are sent to the model again.
+
+    Jobs that were never retried leave their directory behind; the first
+    store opened under a root in each process removes those untouched
+    for `TLDR_CHECKPOINT_TTL_S` (default a week).
+    """
+
+    def __init__(self, key: str, root: str | Path | None = None):
+        root = Path(root or os.getenv("TLDR_CHECKPOINT_DIR", str(DEFAULT_ROOT)))
+        self.key = key
+        self.directory = root / key
+        with _pruned_lock:
+            first = root not in _pruned
+            _pruned.add(root)
+        if first:
+            ttl_s = float(os.getenv("TLDR_CHECKPOINT_TTL_S", DEFAULT_TTL_S))
+            removed = prune_stale(root, ttl_s)
+            if removed:
+                print(f"Removed {removed} stale checkpoint directories from {root}")
+
+    def load(self, stage: str) -> Any | None:
+        return _read_json(self.directory / f"{stage}.json")
+
+    def save(self, stage: str, value: Any) -> None:
+        _write_json(self.directory / f"{stage}.json", value)
+
+    def chunks(self, stage: str) -> ChunkCheckpoint:
+        return ChunkCheckpoint(self.directory / stage)
+
+    def clear(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,322 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from admission import JobAdmission, get_scheduler
+from cancellation import Cancelled, CancelToken
+from checkpoints import ChunkCheckpoint
+from deadline import Deadline
+
+ChunkCall = Callable[[list, int], List[int]]
+
+
+class Degraded(list):
+    """A chunk answer from a degraded path: used by this run, never checkpointed."""
+
+
+class HedgePolicy:
+    """
+    When to fire a duplicate request for a straggling chunk.
+
+    A chunk is hedged once its primary call has been running longer than the
+    `percentile` latency of the chunks that already finished (at least
+    `min_samples` of them) and at least `min_delay_s`, capped at `max_rate`
+    of all chunks.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.9,
+        *,
+        min_samples: int = 3,
+        max_rate: float = 0.25,
+        min_delay_s: float = 1.0,
+        poll_s: float = 0.1,
+    ):
+        if not 0 < percentile <= 1:
+            raise ValueError("`percentile` must be in (0, 1]")
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_rate = max_rate
+        self.min_delay_s = min_delay_s
+        self.poll_s = poll_s
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile, `q` in (0, 1]."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(q * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def run_chunks(
+    call: ChunkCall,
+    batches: List[list],
+    *,
+    max_workers: int = 20,
+    hedge: HedgePolicy | None = None,
+    hedge_call: ChunkCall | None = None,
+    metrics: dict | None = None,
+    checkpoint: ChunkCheckpoint | None = None,
+    cancel: CancelToken | None = None,
+    deadline: Deadline | None = None,
+    deadline_reserve: float = 0.0,
+    fallback: ChunkCall | None = None,
+    on_result: Callable[[int, List[int]], None] | None = None,
+    admission: JobAdmission | None = None,
+    cost: Callable[[list], int] | None = None,
+) -> List[List[int]]:
+    """
+    Run `call(batch, chunk_num)` for every batch in parallel and return the
+    per-chunk results in batch order.
+
+    With a `hedge` policy, straggling chunks get a duplicate request (through
+    `hedge_call`, defaulting to `call`); whichever attempt returns first wins
+    and the other is cancelled or, if already running, abandoned.
+    Hedge counts and latencies are written into `metrics` when given;
+    `unhedged_tail_s` / `tail_improvement_s` keep updating until the
+    primaries that lost to a hedge finish (`unhedged_pending` reaches 0).
+
+    With a `checkpoint`, chunks that already have a stored result are not
+    called again, and each chunk's winning attempt is stored as soon as it
+    returns — including chunks still running when a sibling fails. The
+    first attempt of a hedged pair to return wins; the other's answer is
+    neither stored nor used. `Degraded` answers and deadline fallbacks
+    are not stored either, so a retry asks the model again; both stay
+    `Degraded` in the returned results.
+
+    With a `cancel` token, the first hard failure cancels the token, and a
+    cancelled token (from anywhere) drops every chunk not yet started and
+    raises `Cancelled`; calls already in flight are abandoned.
+
+    With a `deadline` and a local `fallback`, once less than
+    `deadline_reserve` of the budget is left every unfinished chunk takes
+    `fallback(batch, chunk_num)` instead of waiting for the model.
+
+    `on_result(chunk, result)` is called from the calling thread as soon as
+    each chunk's result is settled (restored, returned or fallen back),
+    in completion order.
+
+    Every call (hedges included) first waits for a slot from the
+    process-wide admission scheduler as `admission`'s job and priority
+    (an anonymous interactive job if None), reserving `cost(batch)`
+    estimated tokens.
+    """
+    total = len(batches)
+    results: List[List[int] | None] = [None] * total
+    if total == 0:
+        return []
+
+    hedge_call = hedge_call or call
+    admission = admission or get_scheduler().job(f"run-{id(batches):x}")
+    starts: Dict[Tuple[int, str], float] = {}
+    ends: Dict[Tuple[int, str], float] = {}
+    winners: Dict[int, str] = {}  # chunk -> kind of the attempt that returned first
+    winners_lock = threading.Lock()
+
+    def _settle(chunk: int, result: List[int]) -> None:
+        results[chunk] = result
+        if on_result is not None:
+            on_result(chunk, result)
+
+    def _timed(fn: ChunkCall, chunk: int, kind: str) -> List[int]:
+        tokens = cost(batches[chunk]) if cost is not None else 0
+        with admission.slot(tokens, cancel):
+            if cancel is not None:
+                cancel.raise_if_cancelled()  # queued behind the cancel: don't start
+            starts[(chunk, kind)] = time.monotonic()
+            try:
+                answer = fn(batches[chunk], chunk + 1)
+            finally:
+                ends[(chunk, kind)] = time.monotonic()
+        result = Degraded(answer) if isinstance(answer, Degraded) else list(answer)
+        with winners_lock:
+            won = winners.setdefault(chunk, kind) == kind
+        if won and checkpoint is not None and not isinstance(answer, Degraded):
+            checkpoint.put(chunk, result)
+        return result
+
+    if checkpoint is not None:
+        for chunk in range(total):
+            restored = checkpoint.get(chunk)
+            if restored is not None:
+                _settle(chunk, restored)
+        resumed = sum(r is not None for r in results)
+        if resumed:
+            print(f"Resuming: {resumed}/{total} chunks restored from checkpoint")
+
+    todo = [chunk for chunk in range(total) if results[chunk] is None]
+    if not todo:
+        return results
+
+    primary_pool = ThreadPoolExecutor(max_workers=min(max_workers, len(todo)))
+    max_hedges = int(len(todo) * hedge.max_rate) if hedge else 0
+    hedge_pool = (
+        ThreadPoolExecutor(max_workers=max(1, min(max_workers, max_hedges)))
+        if max_hedges
+        else None
+    )
+
+    owner: Dict = {}  # future -> (chunk, kind)
+    attempts: Dict[int, Dict[str, object]] = {}  # chunk -> {kind: future}
+    latencies: List[float] = []  # effective latency of resolved chunks
+    hedge_wins: List[int] = []
+    timed_out: List[int] = []
+    errors: Dict[int, BaseException] = {}
+
+    try:
+        for chunk in todo:
+            fut = primary_pool.submit(_timed, call, chunk, "primary")
+            owner[fut] = (chunk, "primary")
+            attempts[chunk] = {"primary": fut}
+
+        pending = set(owner)
+        watch = cancel is not None or (deadline is not None and fallback is not None)
+        poll_s = hedge.poll_s if hedge_pool else (0.2 if watch else None)
+        while pending:
+            done, pending = wait(pending, timeout=poll_s, return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+
+            for fut in done:
+                chunk, kind = owner[fut]
+                if results[chunk] is not None:
+                    continue  # loser of a hedged pair
+
+                if fut.exception() is not None:
+                    sibling = [
+                        f for k, f in attempts[chunk].items() if k != kind
+                    ]
+                    if any(
+                        not f.done() or (not f.cancelled() and f.exception() is None)
+                        for f in sibling
+                    ):
+                        errors[chunk] = fut.exception()
+                        continue  # the other attempt may still succeed
+                    if cancel is not None and not isinstance(fut.exception(), Cancelled):
+                        cancel.cancel(f"chunk {chunk + 1} failed: {fut.exception()!r}")
+                    raise fut.exception()
+                if winners.get(chunk) != kind:
+                    continue  # returned second: the sibling's (stored) answer is used
+
+                _settle(chunk, fut.result())
+                latencies.append(now - starts[(chunk, "primary")])
+                if kind == "hedge":
+                    hedge_wins.append(chunk)
+                for other in attempts[chunk].values():
+                    if other is not fut:
+                        other.cancel()
+                        pending.discard(other)
+
+            if fallback is not None and deadline is not None and deadline.low(deadline_reserve):
+                late = [c for c in todo if results[c] is None]
+                if late:
+                    deadline.degrade(f"{len(late)} chunks out of time, used local fallback")
+                for chunk in late:
+                    _settle(chunk, Degraded(fallback(batches[chunk], chunk + 1)))
+                    timed_out.append(chunk)
+                    for fut in attempts[chunk].values():
+                        fut.cancel()
+                break
+
+            if not hedge_pool or len(latencies) < hedge.min_samples:
+                continue
+
+            hedged = sum(1 for a in attempts.values() if "hedge" in a)
+            threshold = max(
+                percentile(latencies, hedge.percentile), hedge.min_delay_s
+            )
+            for chunk in todo:
+                if hedged >= max_hedges:
+                    break
+                started = starts.get((chunk, "primary"))
+                if (
+                    results[chunk] is not None
+                    or "hedge" in attempts[chunk]
+                    or started is None
+                    or now - started <= threshold
+                ):
+                    continue
+                fut = hedge_pool.submit(_timed, hedge_call, chunk, "hedge")
+                owner[fut] = (chunk, "hedge")
+                attempts[chunk]["hedge"] = fut
+                pending.add(fut)
+                hedged += 1
+                print(
+                    f"Hedging chunk {chunk + 1}: {now - started:.2f}s "
+                    f"> p{hedge.percentile * 100:.0f} {threshold:.2f}s"
+                )
+
+        missing = [c for c in range(total) if results[c] is None]
+        if missing:
+            raise errors.get(missing[0]) or RuntimeError(
+                f"chunk {missing[0] + 1} produced no result"
+            )
+    finally:
+        primary_pool.shutdown(wait=False, cancel_futures=True)
+        if hedge_pool:
+            hedge_pool.shutdown(wait=False, cancel_futures=True)
+
+    if metrics is not None:
+        finished = time.monotonic()
+        hedged = [c for c, a in attempts.items() if "hedge" in a]
+        tail = max(latencies, default=0.0)
+
+        def _unhedged_tail() -> float:
+            # for hedge wins, the primary's own latency is what the tail would have been
+            unhedged = list(latencies)
+            for chunk in hedge_wins:
+                key = (chunk, "primary")
+                unhedged.append(ends.get(key, finished) - starts[key])
+            return max(unhedged, default=0.0)
+
+        metrics.update(
+            {
+                "chunks": total,
+                "resumed": total - len(todo),
+                "deadline_fallbacks": len(timed_out),
+                "hedged": len(hedged),
+                "hedge_wins": len(hedge_wins),
+                "hedge_rate": len(hedged) / len(todo),
+                "p50_s": percentile(latencies, 0.5),
+                "p95_s": percentile(latencies, 0.95),
+                "tail_s": tail,
+            }
+        )
+        # Primaries that lost to a hedge are abandoned but still running:
+        # until they finish, the unhedged tail is only a lower bound, so it
+        # is updated (and logged) as each of them completes.
+        running = [attempts[chunk]["primary"] for chunk in hedge_wins]
+        running = [fut for fut in running if not fut.done()]
+        left = [len(running)]
+        lock = threading.Lock()
+
+        def _report_tail(pending: int) -> None:
+            unhedged_tail = _unhedged_tail()
+            metrics.update(
+                {
+                    "unhedged_pending": pending,
+                    "unhedged_tail_s": unhedged_tail,
+                    "tail_improvement_s": unhedged_tail - tail,
+                }
+            )
+            if pending == 0 and hedge_wins:
+                print(
+                    f"Hedging cut the chunk tail from {unhedged_tail:.2f}s to {tail:.2f}s "
+                    f"({len(hedge_wins)} hedge wins)"
+                )
+
+        def _primary_done(_) -> None:
+            with lock:
+                left[0] -= 1
+                _report_tail(left[0])
+
+        _report_tail(left[0])
+        for fut in running:
+            fut.add_done_callback(_primary_done)
+
+    return results
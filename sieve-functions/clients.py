@@ -0,0 +1,48 @@
+import os
+import threading
+
+OPENAI_BASE_URL = "https://api.openai.com/v1"
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
+
+_lock = threading.Lock()
+_env_loaded = False
+_clients: dict = {}
+
+
+def load_env() -> None:
+    """Read `.env` once per process (the first time anything needs config)."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _lock:
+        if not _env_loaded:
+            from dotenv import load_dotenv
+
+            load_dotenv()
+            _env_loaded = True
+
+
+def _client(name: str, key_var: str, url_var: str, default_url: str):
+    client = _clients.get(name)
+    if client is not None:
+        return client
+    load_env()
+    with _lock:
+        if name not in _clients:
+            import openai  # deferred: only paid for by code that calls a model
+
+            _clients[name] = openai.OpenAI(
+                api_key=os.getenv(key_var),
+                base_url=os.getenv(url_var, default_url),
+            )
+        return _clients[name]
+
+
+def get_openai_client():
+    """Process-wide OpenAI client (OPENAI_API_KEY, OPENAI_BASE_URL)."""
+    return _client("openai", "OPENAI_API_KEY", "OPENAI_BASE_URL", OPENAI_BASE_URL)
+
+
+def get_gemini_client():
+    """Process-wide Gemini client on its OpenAI-compatible endpoint (GEMINI_API_KEY, GEMINI_BASE_URL)."""
+    return _client("gemini", "GEMINI_API_KEY", "GEMINI_BASE_URL", GEMINI_BASE_URL)
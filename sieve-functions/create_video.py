@@ -1,31 +1,34 @@
 # from google import genai
 # from google.genai import types
-import os
-import re
+import queue
+import threading
 import time
-from typing import List, Literal
+import uuid
+from typing import Iterator, List, Literal
 
-import openai
-import requests
 import sieve
-import webvtt
-from bs4 import BeautifulSoup
-from dotenv import load_dotenv
-from get_subtitles import get_grouped_subtitles
-from segment_selection import generate_summary, pick_segments
-from youtube_transcript_api import YouTubeTranscriptApi
-
-load_dotenv()
-
-openai_client = openai.OpenAI(
-    api_key=os.getenv("OPENAI_API_KEY"),
-    base_url="https://api.openai.com/v1",
+from admission import INTERACTIVE, JobAdmission, get_scheduler
+from cancellation import CancelToken, cancel_job, register_job, release_job
+from captions import cues_from_transcript_entries, load_captions
+from checkpoints import CheckpointStore, job_key
+from chunk_runner import Degraded, HedgePolicy
+from clients import load_env
+from deadline import Deadline
+from fingerprint_index import TranscriptReuse, get_fingerprint_index
+from get_subtitles import (
+    PUNCTUATION_VERSION,
+    get_grouped_subtitles,
+    get_youtube_title,
+    get_youtube_video_id,
 )
+from playback_plan import PlaybackPlanStream, optimize_playback_plan
+from redundancy import redundant_sentences
+from segment_selection import SELECTION_VERSION, chunk_windows, generate_summary, pick_segments
+from singleflight import SingleFlight
+from skip_spans import get_skip_index
 
-gemini_client = openai.OpenAI(
-    api_key=os.getenv("GEMINI_API_KEY"),
-    base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
-)
+# youtube_transcript_api is only needed by the legacy helper below and is
+# imported there; model clients come from `clients` on first use
 
 
 class Subtitle:
@@ -43,25 +46,13 @@ class Subtitle:
 
 
 def load_subtitles(subtitles_path: str) -> List[Subtitle]:
-    return [
-        Subtitle(
-            text=cap.text,
-            start=cap.start_in_seconds,  # Use float attribute
-            end=cap.end_in_seconds,  # Use float attribute
-        )
-        for cap in webvtt.read(subtitles_path)
-    ]
+    return load_captions(subtitles_path).to_subtitles(Subtitle)
 
 
 def filter_included(included_indicies: List[int], len_subs: int) -> List[int]:
     return [num for num in included_indicies if num < len_subs]
 
 
-def get_youtube_video_id(url: str):
-    match = re.search(r"(?:v=|\/)([0-9A-Za-z_-]{11})(?:[?&]|$)", url)
-    return match.group(1) if match else None
-
-
 def merge_subtitles(
     subtitles: List[Subtitle], include_indices: List[int]
 ) -> List[Subtitle]:
@@ -96,20 +87,23 @@ def merge_subtitles(
     return merged
 
 
-def convert_segments_to_dicts(subtitles: List[Subtitle]) -> List[dict]:
+def convert_segments_to_dicts(
+    subtitles: List[Subtitle], prev_end: float = float("-inf")
+) -> List[dict]:
     """
     Convert Subtitle objects to dicts while making sure segments don’t overlap.
 
     If a segment’s start time is ≤ the end time of the previous segment,
     bump its start to `prev_end + 0.1`.
 
+    `prev_end` continues the overlap check from segments already emitted.
+
     Returns
     -------
     List[dict]
         Each dict has “start” and “end” keys (floats, seconds).
     """
     segments: List[dict] = []
-    prev_end = float("-inf")
 
     # If the input order isn’t guaranteed, uncomment the next line:
     # subtitles = sorted(subtitles, key=lambda s: s.start)
@@ -125,23 +119,104 @@ def convert_segments_to_dicts(subtitles: List[Subtitle]) -> List[dict]:
     return segments
 
 
-def get_youtube_title(video_url):
-    response = requests.get(video_url)
-    soup = BeautifulSoup(response.text, "html.parser")
-    return soup.title.string
+class SegmentStream:
+    """
+    Kept segments of one run, yielded in timeline order while selection is
+    still running.
+
+    A subtitle is final once every selection window covering it has
+    answered (`add`, wired to `pick_segments`' `on_chunk`); finalized kept
+    subtitles are merged and converted exactly as the full result would be,
+    except that a kept run touching the not-yet-final part is held back in
+    case it keeps growing. When only the subtitles in `todo` go to the
+    model, the others are final from the start, kept or not per `kept`.
+    With `max_gap_s` > 0 the converted segments go through
+    `PlaybackPlanStream`, so close ones are joined and short fragments
+    dropped as in the final plan; the last segment is then held back until
+    the gap after it is known or the run ends. Iterating blocks until
+    `close` is called.
+    """
+
+    _DONE = object()
+
+    def __init__(self, chunk_size: int = 100, overlap: int = 25, max_gap_s: float = 0.75):
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.error: BaseException | None = None
+        self._queue: queue.Queue = queue.Queue()
+        self._plan = PlaybackPlanStream(max_gap_s=max_gap_s) if max_gap_s > 0 else None
+
+    def begin(
+        self, subtitles: List[Subtitle], todo: List[int] | None = None, kept: List[int] = ()
+    ) -> None:
+        self.subtitles = subtitles
+        self._todo = list(range(len(subtitles))) if todo is None else list(todo)
+        self._windows = chunk_windows(len(self._todo), self.chunk_size, self.overlap)
+        self._done = [False] * len(self._windows)
+        self._kept: set = set(kept)
+        self._emitted = 0  # subtitles before this index are flushed
+        self._prev_end = float("-inf")
+        self._advance()
+
+    def add(self, chunk: int, indices: List[int]) -> None:
+        # window indices are positions in `todo`
+        self._done[chunk] = True
+        self._kept.update(
+            self._todo[i] for i in map(int, indices) if 0 <= i < len(self._todo)
+        )
+        self._advance()
+
+    def _advance(self) -> None:
+        frontier = next(
+            (
+                self._todo[start]
+                for (start, _), done in zip(self._windows, self._done)
+                if not done
+            ),
+            len(self.subtitles),
+        )
+        upto = frontier
+        if frontier < len(self.subtitles):
+            while upto > self._emitted and upto - 1 in self._kept:
+                upto -= 1
+        if upto <= self._emitted:
+            return
+
+        pending = [i for i in self._kept if self._emitted <= i < upto]
+        blocks = merge_subtitles(self.subtitles, pending) if pending else []
+        segments = convert_segments_to_dicts(blocks, prev_end=self._prev_end)
+        if segments:
+            self._prev_end = segments[-1]["end"]
+        self._emitted = upto
+        for segment in segments:
+            self._put(self._plan.push(segment) if self._plan is not None else [segment])
+
+    def _put(self, segments: List[dict]) -> None:
+        for segment in segments:
+            self._queue.put(segment)
+
+    def close(self, error: BaseException | None = None) -> None:
+        self.error = error
+        if error is None and self._plan is not None:
+            self._put(self._plan.finish())
+        self._queue.put(self._DONE)
+
+    def __iter__(self) -> Iterator[dict]:
+        while True:
+            item = self._queue.get()
+            if item is self._DONE:
+                if self.error is not None:
+                    raise self.error
+                return
+            yield item
 
 
 def get_subtitles_title(youtube_video_url: str):
+    from youtube_transcript_api import YouTubeTranscriptApi
+
     video_id = get_youtube_video_id(youtube_video_url)
     transcript_raw = YouTubeTranscriptApi.get_transcript(video_id)
-    subtitles = [
-        Subtitle(
-            text=subtitle["text"],
-            start=float(subtitle["start"]),
-            end=float(subtitle["start"]) + float(subtitle["duration"]),
-        )
-        for subtitle in transcript_raw
-    ]
+    subtitles = cues_from_transcript_entries(transcript_raw).to_subtitles(Subtitle)
     title = get_youtube_title(youtube_video_url)
     return subtitles, title
 
@@ -152,29 +227,192 @@ def select_segments(
     subtitles: List[Subtitle],
     title: str,
     mode: Literal["fast", "quality"],
+    *,
+    hedge: HedgePolicy | None = None,
+    metrics: dict | None = None,
+    checkpoint: CheckpointStore | None = None,
+    cancel: CancelToken | None = None,
+    deadline: Deadline | None = None,
+    stream: SegmentStream | None = None,
+    stream_completions: bool = False,
+    admission: JobAdmission | None = None,
+    reuse: TranscriptReuse | None = None,
+    prune_redundant: bool = True,
 ):
-    summary = generate_summary(subtitles, title)
-    segments = pick_segments(subtitles, summary, title, adhd_level, mode)
+    # near-duplicate and filler sentences are never kept and never shown
+    # to the models; indices stay global, prompts see only the rest
+    excluded: set = set()
+    if prune_redundant:
+        duplicates, filler = redundant_sentences([s.text for s in subtitles])
+        excluded = set(duplicates) | set(filler)
+        print(
+            f"Pruned {len(excluded)}/{len(subtitles)} sentences before selection "
+            f"({len(duplicates)} near-duplicates, {len(filler)} filler)"
+        )
+
+    summary = checkpoint.load("summary") if checkpoint is not None else None
+    # sentences from a degraded transcript or heuristic boundaries may differ
+    # on a retry, so selection answers against them are not resumable
+    upstream_degraded = deadline is not None and deadline.degraded
+    selection_checkpoint = None if upstream_degraded else checkpoint
+    if summary is None and reuse is not None:
+        summary = reuse.reused_summary()
+    if summary is None and deadline is not None and deadline.low(0.4):
+        # the summary only steers selection; the title is a usable stand-in,
+        # but answers against it are not resumed by a retry with a summary
+        deadline.degrade("skipped summary, selecting against the title")
+        summary = title
+        selection_checkpoint = None
+    if summary is None:
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        # with a deadline, the summary may use the budget down to the same 40%
+        timeout_s = (
+            deadline.remaining() - 0.4 * deadline.budget_s
+            if deadline is not None and deadline.budget_s is not None
+            else None
+        )
+        try:
+            summary = generate_summary(
+                [s for i, s in enumerate(subtitles) if i not in excluded], title, timeout_s
+            )
+        except TimeoutError:
+            deadline.degrade("summary timed out, selecting against the title")
+            summary = title
+            selection_checkpoint = None
+        else:
+            if checkpoint is not None and not upstream_degraded:
+                checkpoint.save("summary", summary)
+
+    # sentences inside a matched span take the stored decision; the rest
+    # go to the model as one list whose local indices map back via `todo`
+    kept, todo = reuse.selection(len(subtitles)) if reuse is not None else ([], None)
+    if reuse is not None:
+        reuse.summary = summary
+    if todo is None:
+        todo = list(range(len(subtitles)))
+    kept = [i for i in kept if i not in excluded]
+    todo = [i for i in todo if i not in excluded]
+    if stream is not None:
+        stream.begin(subtitles, todo, kept)
+    picked = []
+    if todo:
+        local = pick_segments(
+            [subtitles[i] for i in todo],
+            summary,
+            title,
+            adhd_level,
+            mode,
+            hedge=hedge,
+            metrics=metrics,
+            checkpoint=selection_checkpoint,
+            cancel=cancel,
+            deadline=deadline,
+            on_chunk=stream.add if stream is not None else None,
+            stream_completions=stream_completions,
+            admission=admission,
+        )
+        picked = [todo[i] for i in local if 0 <= i < len(todo)]
+        if isinstance(local, Degraded) and reuse is not None:
+            reuse.degraded = True  # a partial selection is never recorded for reuse
+    segments = sorted(set(kept) | set(picked))
     print(segments)
     return segments
 
 
-@sieve.function(
-    name="create-tldr-video",  # Renamed to distinguish
-    python_packages=[
-        "python-dotenv",
-        "openai",
-        "webvtt-py",
-        "beautifulsoup4",
-        "youtube-transcript-api",
-    ],
-    system_packages=["ffmpeg"],
-)
-def create_adhd_video(
+CANCEL_MARKER = "CANCEL"
+
+
+def tldr_job_key(
+    youtube_video_url: str, mode: str, adhd_level: str, run_id: str | None = None
+) -> str:
+    """
+    Key of a TL;DR job (cancel token, checkpoint directory, admission job).
+    A `run_id` narrows it to one run (a stream) or to the runs sharing one
+    set of settings (see `settings_run_id`). The prompt/model versions are
+    part of it, so a deploy that changes them never resumes older checkpoints.
+    """
+    parts = [
+        get_youtube_video_id(youtube_video_url) or youtube_video_url,
+        mode,
+        adhd_level,
+        PUNCTUATION_VERSION,
+        SELECTION_VERSION,
+    ]
+    return job_key(*parts, run_id) if run_id else job_key(*parts)
+
+
+def settings_run_id(
+    deadline_s: float = 0, max_gap_s: float = 0.75, stream_completions: bool = False
+) -> str:
+    """
+    Run ID of `create-tldr-video` jobs with these settings: jobs coalesce
+    exactly when they share a job key (cancel token, checkpoints, marker),
+    and a retry with the same settings still resumes.
+    """
+    return job_key("settings", deadline_s, max_gap_s, stream_completions)[:12]
+
+
+def cancel_tldr_job(
+    youtube_video_url: str,
+    mode: str,
+    adhd_level: str = "normal",
+    deadline_s: float = 0,
+    max_gap_s: float = 0.75,
+    stream_completions: bool = False,
+) -> None:
+    """
+    Abort the `create-tldr-video` run with these settings on this host:
+    directly if it runs in this process, and via a marker file in its
+    checkpoint directory for other processes sharing TLDR_CHECKPOINT_DIR.
+    The web app cancels through Sieve's job API instead (`cancelJob` in
+    app/actions.ts), which works for `isolate-podcast-guest` jobs too.
+    """
+    run_id = settings_run_id(deadline_s, max_gap_s, stream_completions)
+    key = tldr_job_key(youtube_video_url, mode, adhd_level, run_id)
+    marker = CheckpointStore(key).directory / CANCEL_MARKER
+    marker.parent.mkdir(parents=True, exist_ok=True)
+    marker.touch()
+    cancel_job(key)
+
+
+def run_tldr_pipeline(
     youtube_video_url: str,
     mode: Literal["fast", "quality"],
     adhd_level: Literal["relaxed", "normal", "hyper"] = "normal",
-):
+    hedge_stragglers: bool = False,
+    deadline_s: float = 0,
+    max_gap_s: float = 0.75,
+    stream: SegmentStream | None = None,
+    stream_completions: bool = False,
+    priority: int = INTERACTIVE,
+    reuse_duplicates: bool = True,
+    prune_redundant: bool = True,
+    skip_known_spans: bool = True,
+    run_id: str | None = None,
+    report: dict | None = None,
+) -> List[dict]:
+    """
+    Pipeline body of `create_adhd_video`: transcript → boundaries → selection
+    → playback plan (gaps under `max_gap_s` bridged, 0 disables).
+
+    With `stream`, finalized segments are also pushed to it as selection
+    windows come back. `stream_completions` streams the model answers.
+    Model calls share the process-wide admission scheduler at `priority`.
+    With `reuse_duplicates`, transcript spans matching an already processed
+    video (re-uploads, clips) reuse its boundaries and selection from the
+    fingerprint index, and this run's results are added to it. With
+    `prune_redundant`, repeated sentences (sponsor reads, recaps) and pure
+    filler are dropped before the summary and selection prompts. With
+    `skip_known_spans`, imported sponsor/intro/outro spans and the
+    channel's recurring intros are cut from the transcript up front.
+    A `run_id` gives the run its own job key (see `tldr_job_key`).
+
+    With `deadline_s` > 0 the stages trade quality for time as the budget
+    runs out; `report` (when given) receives `degraded` and `degradations`.
+    Degraded answers are never checkpointed or recorded for reuse.
+    """
+    load_env()
     print(
         f"Running parallel ADHD video creation for: {youtube_video_url} with level: {adhd_level}"
     )
@@ -183,9 +421,62 @@ def create_adhd_video(
     # video_path = "tmp7e1_greu.mp4"
     # title = "How AI is Reinventing Software Business Models ft. Bret Taylor of Sierra"
     # subtitles_path = "subtitles.vtt"
-    subtitles, title = get_grouped_subtitles(youtube_video_url)
+    hedge = HedgePolicy() if hedge_stragglers else None
+    deadline = Deadline(deadline_s) if deadline_s > 0 else None
+    punctuation_metrics: dict = {}
+    selection_metrics: dict = {}
+    # a retried job with the same inputs resumes from its last finished stage
+    key = tldr_job_key(youtube_video_url, mode, adhd_level, run_id)
+    checkpoint = CheckpointStore(key)
+    # first hard failure or `cancel_tldr_job` stops all outstanding work
+    marker = checkpoint.directory / CANCEL_MARKER
+    marker.unlink(missing_ok=True)
+    cancel = register_job(key, marker=marker)
+    admission = get_scheduler().job(key, priority)
+    reuse = None
+    if reuse_duplicates:
+        video_id = get_youtube_video_id(youtube_video_url) or youtube_video_url
+        reuse = TranscriptReuse(
+            get_fingerprint_index(),
+            video_id,
+            f"{mode}-{adhd_level}-{SELECTION_VERSION}",
+            {"boundaries": PUNCTUATION_VERSION, "summary": SELECTION_VERSION},
+        )
+    try:
+        subtitles, title = get_grouped_subtitles(
+            youtube_video_url,
+            hedge=hedge,
+            metrics=punctuation_metrics,
+            checkpoint=checkpoint,
+            cancel=cancel,
+            deadline=deadline,
+            stream_completions=stream_completions,
+            admission=admission,
+            reuse=reuse,
+            skip=get_skip_index() if skip_known_spans else None,
+        )
 
-    segments = select_segments(youtube_video_url, adhd_level, subtitles, title, mode)
+        segments = select_segments(
+            youtube_video_url,
+            adhd_level,
+            subtitles,
+            title,
+            mode,
+            hedge=hedge,
+            metrics=selection_metrics,
+            checkpoint=checkpoint,
+            cancel=cancel,
+            deadline=deadline,
+            stream=stream,
+            stream_completions=stream_completions,
+            admission=admission,
+            reuse=reuse,
+            prune_redundant=prune_redundant,
+        )
+    finally:
+        release_job(key)
+    print(f"Punctuation chunk metrics: {punctuation_metrics}")
+    print(f"Selection chunk metrics: {selection_metrics}")
     output_path = "video.mp4"
 
     print(f"Starting final concatenation to {output_path}...")
@@ -198,8 +489,141 @@ def create_adhd_video(
     print(f"Concatenation finished. Time taken: {time.time() - concat_start_time:.2f}s")
     print(f"Total function execution time: {time.time() - overall_start_time:.2f}s")
 
+    if reuse is not None and not (deadline and deadline.degraded):
+        reuse.record(segments)
+    checkpoint.clear()  # finished: nothing left to resume
+
     # return sieve.File(path=output_path)
-    return convert_segments_to_dicts(subtitles)
+    plan = convert_segments_to_dicts(subtitles)
+    if max_gap_s > 0:
+        plan = optimize_playback_plan(plan, max_gap_s=max_gap_s)
+    if deadline is not None:
+        print(f"Deadline degradations: {deadline.degradations or 'none'}")
+        if report is not None:
+            report.update(
+                {"degraded": deadline.degraded, "degradations": deadline.degradations}
+            )
+    return plan
+
+
+# concurrent jobs with the same job key share one pipeline run
+_tldr_flights = SingleFlight(memo_s=60.0)
+
+
+@sieve.function(
+    name="create-tldr-video",  # Renamed to distinguish
+    python_packages=[
+        "python-dotenv",
+        "openai",
+        "beautifulsoup4",
+        "youtube-transcript-api",
+        "numpy",
+    ],
+    system_packages=["ffmpeg"],
+)
+def create_adhd_video(
+    youtube_video_url: str,
+    mode: Literal["fast", "quality"],
+    adhd_level: Literal["relaxed", "normal", "hyper"] = "normal",
+    hedge_stragglers: bool = False,
+    deadline_s: float = 0,
+    max_gap_s: float = 0.75,
+    stream_completions: bool = False,
+):
+    """
+    Cut a YouTube video down to its key segments. Concurrent jobs for the
+    same video, mode, level and settings attach to a single in-flight run
+    (and only those share a job key). A positive
+    `deadline_s` returns a best-effort (possibly degraded) result in time.
+    Kept segments closer than `max_gap_s` are joined to save player seeks.
+    `stream_completions` streams model answers and keeps partial ones.
+    """
+    run_id = settings_run_id(deadline_s, max_gap_s, stream_completions)
+    return _tldr_flights.do(
+        tldr_job_key(youtube_video_url, mode, adhd_level, run_id),
+        lambda: run_tldr_pipeline(
+            youtube_video_url,
+            mode,
+            adhd_level,
+            hedge_stragglers,
+            deadline_s,
+            max_gap_s,
+            stream_completions=stream_completions,
+            run_id=run_id,
+        ),
+    )
+
+
+def stream_tldr_pipeline(
+    youtube_video_url: str,
+    mode: Literal["fast", "quality"],
+    adhd_level: Literal["relaxed", "normal", "hyper"] = "normal",
+    hedge_stragglers: bool = False,
+    max_gap_s: float = 0.75,
+) -> Iterator[dict]:
+    """
+    `run_tldr_pipeline` in a worker thread, yielding segments as they are
+    finalized. Closing the generator early cancels the job. Segments closer
+    than `max_gap_s` are joined as in the final plan (0 disables).
+
+    Each stream is its own run (own job key, cancel token and checkpoint
+    directory), so closing it never touches a `create-tldr-video` run or
+    another stream for the same video and settings.
+    """
+    stream = SegmentStream(max_gap_s=max_gap_s)
+    run_id = uuid.uuid4().hex
+    key = tldr_job_key(youtube_video_url, mode, adhd_level, run_id)
+    cancel = register_job(key)  # the pipeline picks this token up
+
+    def _run():
+        try:
+            run_tldr_pipeline(
+                youtube_video_url,
+                mode,
+                adhd_level,
+                hedge_stragglers,
+                max_gap_s=max_gap_s,
+                stream=stream,
+                run_id=run_id,
+            )
+        except BaseException as e:
+            CheckpointStore(key).clear()  # a private run is never resumed
+            stream.close(e)
+        else:
+            stream.close()
+
+    worker = threading.Thread(target=_run, daemon=True)
+    worker.start()
+    try:
+        yield from stream
+    finally:
+        if worker.is_alive():
+            cancel.cancel("stream closed by the consumer")
+
+
+@sieve.function(
+    name="create-tldr-video-stream",
+    python_packages=[
+        "python-dotenv",
+        "openai",
+        "beautifulsoup4",
+        "youtube-transcript-api",
+        "numpy",
+    ],
+    system_packages=["ffmpeg"],
+)
+def create_adhd_video_stream(
+    youtube_video_url: str,
+    mode: Literal["fast", "quality"],
+    adhd_level: Literal["relaxed", "normal", "hyper"] = "normal",
+    hedge_stragglers: bool = False,
+):
+    """
+    Incremental `create-tldr-video`: yields each kept {"start", "end"}
+    segment in timeline order as soon as every window covering it has been
+    processed, so playback of the opening can start early.
+    """
+    yield from stream_tldr_pipeline(youtube_video_url, mode, adhd_level, hedge_stragglers)
 
 
 # create_adhd_video("https://www.youtube.com/watch?v=sjeie9Y7AZk")
@@ -0,0 +1,42 @@
+import time
+from typing import List
+
+
+class Deadline:
+    """
+    Time budget for one job, tracked across stages.
+
+    Stages ask `low(fraction)` before doing something expensive and switch
+    to a cheaper fallback when less than that fraction of the original
+    budget is left; each fallback taken is recorded with `degrade` so the
+    result can be flagged. A budget of None (or <= 0) never runs low.
+    """
+
+    def __init__(self, budget_s: float | None):
+        self.budget_s = budget_s if budget_s and budget_s > 0 else None
+        self.started = time.monotonic()
+        self.degradations: List[str] = []
+
+    def remaining(self) -> float:
+        if self.budget_s is None:
+            return float("inf")
+        return self.budget_s - (time.monotonic() - self.started)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def low(self, fraction: float) -> bool:
+        """True once less than `fraction` of the budget remains."""
+        if self.budget_s is None:
+            return False
+        return self.remaining() < fraction * self.budget_s
+
+    def degrade(self, reason: str) -> None:
+        if reason not in self.degradations:
+            print(f"Deadline: {reason} ({self.remaining():.1f}s left)")
+            self.degradations.append(reason)
+
+    @property
+    def degraded(self) -> bool:
+        return bool(self.degradations)
@@ -0,0 +1,390 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+DEFAULT_PATH = Path.home() / ".cache" / "tldr-tube" / "fingerprints.sqlite"
+
+SHINGLE = 5  # words per shingle
+STRIDE = 30  # fingerprinted windows are 2 * STRIDE shingles, overlapping by half
+NUM_PERM = 64
+BANDS = 16  # LSH bands of NUM_PERM // BANDS rows
+ANCHOR = 8  # exact words needed to start an alignment
+MIN_RUN = 24  # matched words needed to accept an aligned span
+_PRIME = 4294967311  # smallest prime above 2**32
+
+# query words [start, end) ↔ stored video, stored index of `start`
+Span = Tuple[int, int, str, int]
+
+
+def normalize(word: str) -> str:
+    return re.sub(r"[^\w']+", "", word.lower())
+
+
+def _shingle_hashes(tokens: Sequence[str]) -> List[int]:
+    return [
+        zlib.crc32(" ".join(tokens[i : i + SHINGLE]).encode("utf-8"))
+        for i in range(len(tokens) - SHINGLE + 1)
+    ]
+
+
+def minhash(hashes, offsets):
+    """
+    NUM_PERM-wide MinHash signatures of consecutive groups of 32-bit
+    `hashes` (a uint64 array), one row per group starting at `offsets`.
+    """
+    import numpy as np  # deferred: only needed once a transcript is indexed
+
+    rng = np.random.default_rng(20240601)  # fixed: signatures must compare across runs
+    a = rng.integers(1, 2**32, NUM_PERM, dtype=np.uint64)
+    b = rng.integers(0, 2**32, NUM_PERM, dtype=np.uint64)
+    permuted = (hashes[:, None] * a[None, :] + b[None, :]) % np.uint64(_PRIME)
+    return np.minimum.reduceat(permuted, offsets, axis=0)
+
+
+def band_keys(tokens: Sequence[str]) -> List[Tuple[int, int, int]]:
+    """
+    (band, bucket hash, window) for every fingerprinted window: MinHash
+    signatures of the window's shingles, banded for LSH.
+    """
+    import numpy as np
+
+    hashes = np.asarray(_shingle_hashes(tokens), dtype=np.uint64)
+    if len(hashes) == 0:
+        return []
+    blocks = minhash(hashes, np.arange(0, len(hashes), STRIDE))
+    windows = np.minimum(blocks[:-1], blocks[1:]) if len(blocks) > 1 else blocks
+    rows = NUM_PERM // BANDS
+    keys: List[Tuple[int, int, int]] = []
+    for w, signature in enumerate(windows):
+        for band in range(BANDS):
+            chunk = signature[band * rows : (band + 1) * rows]
+            keys.append((band, zlib.crc32(chunk.tobytes()), w))
+    return keys
+
+
+def align(
+    query: Sequence[str], stored: Sequence[str], min_run: int = MIN_RUN
+) -> List[Tuple[int, int, int]]:
+    """
+    Matching runs between two token lists as (query start, query end,
+    stored start), on a constant offset. A run starts from an exact
+    ANCHOR-word match and extends through isolated caption differences
+    (up to two mismatched words in a row); runs shorter than `min_run`
+    matched words are dropped.
+    """
+    anchors: Dict[Tuple[str, ...], List[int]] = {}
+    for j in range(len(stored) - ANCHOR + 1):
+        positions = anchors.setdefault(tuple(stored[j : j + ANCHOR]), [])
+        if len(positions) < 4:  # repeated phrases: a few candidates are enough
+            positions.append(j)
+
+    runs: List[Tuple[int, int, int]] = []
+    i = 0
+    while i <= len(query) - ANCHOR:
+        best = (0, 0, 0)  # matched, length, stored start
+        for j in anchors.get(tuple(query[i : i + ANCHOR]), ()):
+            matched = length = k = misses = 0
+            while i + k < len(query) and j + k < len(stored):
+                if query[i + k] == stored[j + k]:
+                    matched, misses, length = matched + 1, 0, k + 1  # never end on a mismatch
+                else:
+                    misses += 1
+                    if misses > 2:
+                        break
+                k += 1
+            if matched > best[0]:
+                best = (matched, length, j)
+        matched, length, j = best
+        if matched >= min_run:
+            runs.append((i, i + length, j))
+            i += length
+        else:
+            i += 1
+    return runs
+
+
+class FingerprintIndex:
+    """
+    Processed transcripts, findable by content rather than video ID.
+
+    Each stored video keeps its normalized words plus the results worth
+    reusing (phrase-boundary word indices, kept word ranges per
+    mode/level/version, summary), the boundaries and summary tagged with
+    the prompt/model version that produced them; its LSH band buckets
+    live in an SQLite table so candidates for a new transcript are one
+    join away.
+    """
+
+    def __init__(self, path: str | Path = DEFAULT_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        with self._connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS videos (key TEXT PRIMARY KEY, record TEXT)")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS bands "
+                "(band INTEGER, hash INTEGER, video TEXT, win INTEGER)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS bands_bucket ON bands (band, hash)")
+            db.execute("CREATE INDEX IF NOT EXISTS bands_video ON bands (video)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key: str) -> dict | None:
+        with self._connect() as db:
+            row = db.execute("SELECT record FROM videos WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def add(
+        self,
+        key: str,
+        tokens: List[str],
+        boundaries: List[int],
+        selections: Dict[str, List[List[int]]],
+        summary: str | None = None,
+        versions: Dict[str, str] | None = None,
+    ) -> None:
+        """
+        Store (or update) `key`; selections merge with earlier ones for the
+        same words. `versions` tags the boundaries and the summary.
+        """
+        versions = versions or {}
+        with self._lock:
+            existing = self.get(key) or {}
+            same_words = existing.get("tokens") == tokens
+            old_versions = existing.get("versions", {})
+            record = {
+                "tokens": tokens,
+                "boundaries": boundaries,
+                "selections": {**(existing["selections"] if same_words else {}), **selections},
+                "summary": summary or existing.get("summary"),
+                "versions": {
+                    "boundaries": versions.get("boundaries"),
+                    "summary": versions.get("summary") if summary else old_versions.get("summary"),
+                },
+            }
+            with self._connect() as db:
+                db.execute(
+                    "INSERT OR REPLACE INTO videos (key, record) VALUES (?, ?)",
+                    (key, json.dumps(record)),
+                )
+                if not same_words:
+                    db.execute("DELETE FROM bands WHERE video = ?", (key,))
+                    db.executemany(
+                        "INSERT INTO bands (band, hash, video, win) VALUES (?, ?, ?, ?)",
+                        [(band, h, key, w) for band, h, w in band_keys(tokens)],
+                    )
+
+    def candidates(
+        self, tokens: List[str], exclude: str | None = None, min_windows: int = 2, limit: int = 3
+    ) -> List[str]:
+        """Stored videos sharing an LSH bucket with at least `min_windows` query windows."""
+        keys = band_keys(tokens)
+        if not keys:
+            return []
+        with self._connect() as db:
+            db.execute("CREATE TEMP TABLE probe (band INTEGER, hash INTEGER, win INTEGER)")
+            db.executemany("INSERT INTO probe VALUES (?, ?, ?)", keys)
+            rows = db.execute(
+                "SELECT b.video, COUNT(DISTINCT p.win) AS hits FROM probe p "
+                "JOIN bands b ON b.band = p.band AND b.hash = p.hash "
+                "WHERE b.video != ? GROUP BY b.video HAVING hits >= ? "
+                "ORDER BY hits DESC LIMIT ?",
+                (exclude or "", min_windows, limit),
+            ).fetchall()
+        return [video for video, _ in rows]
+
+    def match(self, tokens: List[str], exclude: str | None = None) -> List[Span]:
+        """Non-overlapping spans of `tokens` aligned to stored transcripts, longest first."""
+        runs: List[Span] = []
+        for video in self.candidates(tokens, exclude):
+            record = self.get(video)
+            if record is not None:
+                runs += [(qs, qe, video, ss) for qs, qe, ss in align(tokens, record["tokens"])]
+
+        taken: List[Span] = []
+        for span in sorted(runs, key=lambda r: r[1] - r[0], reverse=True):
+            if all(span[1] <= t[0] or span[0] >= t[1] for t in taken):
+                taken.append(span)
+        return sorted(taken)
+
+
+class TranscriptReuse:
+    """
+    One job's use of the fingerprint index: look the transcript up once
+    (`begin`), hand out stored boundaries and selections for the matched
+    spans so only the rest goes to the model, and store this job's results
+    (`record`) for future duplicates. Everything is mapped by word
+    position, so timestamps always come from the new transcript.
+
+    `variant` names the selection (mode, level and selection version);
+    stored boundaries and summaries are only reused when their tag in
+    `versions` ("boundaries", "summary") matches, so a prompt or model
+    change never reuses older answers.
+    """
+
+    def __init__(
+        self,
+        index: FingerprintIndex,
+        key: str,
+        variant: str,
+        versions: Dict[str, str] | None = None,
+    ):
+        self.index = index
+        self.key = key
+        self.variant = variant
+        self.versions = versions or {}
+        self.summary: str | None = None
+        self.degraded = False  # set when an answer was partial: nothing is recorded then
+        self.tokens: List[str] = []
+        self.spans: List[Span] = []
+        self._records: Dict[str, dict] = {}
+        self._groups: List[Tuple[int, int]] = []
+        self._ends: List[int] = []
+
+    def begin(self, words: List[str], checkpoint=None) -> None:
+        """
+        Match the transcript against the index. The spans and the parts of
+        the matched records they are used with are checkpointed together:
+        chunk checkpoints of later stages are positions in what is left to
+        send, so a resumed job must not see records updated meanwhile.
+        """
+        self.tokens = [normalize(w) for w in words]
+        saved = checkpoint.load("reuse") if checkpoint is not None else None
+        if saved is None:
+            try:
+                spans = self.index.match(self.tokens, exclude=self.key)
+                records = {video: self._snapshot(video) for _, _, video, _ in spans}
+            except Exception as e:  # reuse is an optimisation, never a failure
+                print(f"Fingerprint lookup failed: {e!r}")
+                spans, records = [], {}
+            saved = {"spans": spans, "records": records}
+            if checkpoint is not None:
+                checkpoint.save("reuse", saved)
+        self.spans = [tuple(span) for span in saved["spans"]]
+        self._records = saved["records"]
+        covered = sum(end - start for start, end, _, _ in self.spans)
+        if covered:
+            print(
+                f"Fingerprint match: {covered}/{len(self.tokens)} words in "
+                f"{len(self.spans)} spans from {sorted(self._records)}"
+            )
+
+    def _snapshot(self, video: str) -> dict:
+        record = self.index.get(video) or {}
+        tags = record.get("versions", {})
+
+        def current(stage: str):  # answers of older prompts/models are never reused
+            return record.get(stage) if tags.get(stage) == self.versions.get(stage) else None
+
+        return {
+            "boundaries": current("boundaries"),
+            "selections": record.get("selections", {}),
+            "summary": current("summary"),
+            "words": len(record.get("tokens", ())),
+        }
+
+    def _span_at(self, start: int, end: int) -> Span | None:
+        for span in self.spans:
+            if span[0] <= start and end <= span[1]:
+                return span
+        return None
+
+    def boundaries(self) -> Tuple[List[int], List[int]]:
+        """(reused boundary word indices, word indices still to send to the model)."""
+        reused: List[int] = []
+        covered = [False] * len(self.tokens)
+        for start, end, video, stored_start in self.spans:
+            stored = self._records[video].get("boundaries")
+            if stored is None:
+                continue
+            lo, hi = stored_start, stored_start + (end - start)
+            reused += [b - stored_start + start for b in stored if lo <= b < hi]
+            covered[start:end] = [True] * (end - start)
+        return reused, [i for i, c in enumerate(covered) if not c]
+
+    def set_boundaries(self, ends: List[int]) -> None:
+        """Word ranges of the sentences, as `group_by_indices` builds them."""
+        self._ends = sorted(set(i for i in ends if 0 <= i < len(self.tokens)))
+        self._groups = []
+        start = 0
+        for end in self._ends:
+            self._groups.append((start, end))
+            start = end + 1
+
+    def selection(self, n_sentences: int) -> Tuple[List[int], List[int]]:
+        """(kept sentence indices reused, sentence indices still to send to the model)."""
+        if len(self._groups) != n_sentences:  # not grouped by boundaries (degraded run)
+            return [], list(range(n_sentences))
+        kept: List[int] = []
+        todo: List[int] = []
+        for g, (start, end) in enumerate(self._groups):
+            span = self._span_at(start, end)
+            ranges = (
+                self._records[span[2]].get("selections", {}).get(self.variant)
+                if span is not None
+                else None
+            )
+            if ranges is None:
+                todo.append(g)
+                continue
+            offset = span[3] - span[0]
+            hits = sum(
+                1
+                for w in range(start + offset, end + offset + 1)
+                if any(a <= w <= b for a, b in ranges)
+            )
+            if hits * 2 >= end - start + 1:
+                kept.append(g)
+        return kept, todo
+
+    def reused_summary(self, min_coverage: float = 0.9) -> str | None:
+        """
+        Stored summary of a video matching nearly all of this transcript and
+        nearly all of its own: a clip of a long video, or a long video
+        containing a clip, is about something else as a whole.
+        """
+        for video, record in self._records.items():
+            covered = sum(e - s for s, e, v, _ in self.spans if v == video)
+            if (
+                record.get("summary")
+                and covered >= min_coverage * len(self.tokens)
+                and covered >= min_coverage * record.get("words", 0)
+            ):
+                return record["summary"]
+        return None
+
+    def record(self, kept: List[int]) -> None:
+        if self.degraded:
+            return
+        ranges = [list(self._groups[g]) for g in sorted(set(kept)) if g < len(self._groups)]
+        try:
+            self.index.add(
+                self.key,
+                self.tokens,
+                self._ends,
+                {self.variant: ranges},
+                self.summary,
+                self.versions,
+            )
+        except Exception as e:
+            print(f"Could not store fingerprint for {self.key}: {e!r}")
+
+
+_index: FingerprintIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_fingerprint_index() -> FingerprintIndex:
+    """Process-wide index at TLDR_FINGERPRINT_DB (default ~/.cache/tldr-tube/fingerprints.sqlite)."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = FingerprintIndex(os.getenv("TLDR_FINGERPRINT_DB", str(DEFAULT_PATH)))
+        return _index
@@ -1,21 +1,24 @@
 import json
-import os
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from pathlib import Path
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import List, Tuple
 
-import openai
-import sieve
-import webvtt
-from dotenv import load_dotenv
+from admission import JobAdmission, estimate_tokens
+from artifact_store import JSON3, METADATA, get_artifact_store
+from cancellation import CancelToken, Cancelled
+from captions import cues_from_transcript_entries, load_captions, split_words
+from checkpoints import CheckpointStore, job_key
+from chunk_runner import Degraded, HedgePolicy, run_chunks
+from clients import get_gemini_client, get_openai_client
+from deadline import Deadline
+from fingerprint_index import TranscriptReuse
+from index_stream import stream_indices
+from sieve_jobs import push_job
+from skip_spans import SkipIndex, drop_skipped, known_skip_spans
 
-load_dotenv()
-
-openai_client = openai.OpenAI(
-    api_key=os.getenv("OPENAI_API_KEY"),
-    base_url="https://api.openai.com/v1",
-)
+# requests, bs4, sieve and youtube_transcript_api are imported where
+# they are used so that importing this module stays cheap on cold starts
 
 
 class Subtitle:
@@ -53,7 +56,26 @@ def safe_json(content: str) -> dict:
     return data
 
 
-def download_video(url):
+def download_video(url, cancel: CancelToken | None = None):
+    """
+    Fetch title + json3 subtitles through `sieve/youtube-downloader`.
+
+    Results are kept in the artifact store, so a video already fetched (by
+    either Sieve function, if they share `TLDR_ARTIFACT_DIR`) is not
+    downloaded again.
+
+    If `cancel` fires while the job is running, the job is cancelled (see
+    `push_job`) and `(None, None)` is returned.
+    """
+    video_id = get_youtube_video_id(url)
+    store = get_artifact_store()
+    if video_id is not None:
+        metadata = store.get_json(video_id, METADATA)
+        cached = store.get(video_id, JSON3)
+        if metadata is not None and cached is not None:
+            print(f"Using stored transcript for {video_id}")
+            return metadata["title"], str(cached)
+
     download_type = "subtitles"
     resolution = "720p"
     include_audio = True
@@ -67,8 +89,9 @@ def download_video(url):
     audio_format = "mp3"
     subtitle_format = "json3"
 
-    youtube_downloader = sieve.function.get("sieve/youtube-downloader")
-    output = youtube_downloader.run(
+    output = push_job(
+        "sieve/youtube-downloader",
+        cancel,
         url,
         download_type,
         resolution,
@@ -84,11 +107,22 @@ def download_video(url):
         subtitle_format,
     )
 
-    for index, output_object in enumerate(output):
-        if index == 0:
-            title = output_object["title"]
-        elif index == 1:
-            subtitles_path = output_object["en"].path
+    title = subtitles_path = None
+    try:
+        for index, output_object in enumerate(output):
+            if index == 0:
+                metadata = output_object
+                title = metadata["title"]
+            elif index == 1:
+                subtitles_path = output_object["en"].path
+    except Cancelled:
+        return None, None
+
+    if video_id is not None and subtitles_path is not None:
+        store.put_json(
+            video_id, METADATA, {k: metadata.get(k) for k in metadata_fields}
+        )
+        subtitles_path = str(store.put_file(video_id, JSON3, subtitles_path))
 
     return title, subtitles_path
 
@@ -98,52 +132,173 @@ def load_subtitles_json3(subtitles_path: str) -> List[Subtitle]:
     Parse a YouTube json3 transcript (one file per language) and return
     a list of word-level Subtitle objects, sorted by start time.
     """
-    data = json.loads(Path(subtitles_path).read_text(encoding="utf-8"))
+    return load_captions(subtitles_path, "json3").to_subtitles(Subtitle)
 
-    subs: List[Subtitle] = []
 
-    for event in data.get("events", []):
-        t_start_ms: int | None = event.get("tStartMs")
-        if t_start_ms is None or "segs" not in event:  # style / window events
-            continue
+def load_subtitles(subtitles_path: str) -> List[Subtitle]:
+    """Caption file in any format `captions` understands (VTT, SRT, ...)."""
+    return load_captions(subtitles_path).to_subtitles(Subtitle)
 
-        segs = event["segs"]
 
-        for i, seg in enumerate(segs):
-            word = seg.get("utf8", "").strip()
-            if not word:  # ignore empty/whitespace
-                continue
+def get_youtube_video_id(url: str):
+    match = re.search(r"(?:v=|\/)([0-9A-Za-z_-]{11})(?:[?&]|$)", url)
+    return match.group(1) if match else None
 
-            offset_ms = seg.get("tOffsetMs", 0)
-            start = (t_start_ms + offset_ms) / 1000.0  # → seconds
 
-            # ───── determine an end time ─────────────────────
-            if i + 1 < len(segs):  # next word inside same event
-                next_offset = segs[i + 1].get("tOffsetMs", offset_ms)
-                end = (t_start_ms + next_offset) / 1000.0
-            else:  # last word in this event
-                dur_ms = event.get("dDurationMs")
-                if dur_ms is not None:
-                    end = (t_start_ms + dur_ms) / 1000.0
-                else:  # fallback: tiny padding
-                    end = start + 0.15
+def get_youtube_title(video_url):
+    import requests
+    from bs4 import BeautifulSoup
 
-            subs.append(Subtitle(word, start, end))
+    response = requests.get(video_url, timeout=10)
+    soup = BeautifulSoup(response.text, "html.parser")
+    title = soup.title.string if soup.title else ""
+    return re.sub(r"\s*-\s*YouTube$", "", title or "").strip()
 
-    # Safety: keep chronological order
-    subs.sort(key=lambda s: s.start)
-    return subs
 
+def get_youtube_channel_id(video_url) -> str | None:
+    """Channel ID (UC…) scraped from the watch page, or None."""
+    import requests
 
-def load_subtitles(subtitles_path: str) -> List[Subtitle]:
-    return [
-        Subtitle(
-            text=cap.text,
-            start=cap.start_in_seconds,  # Use float attribute
-            end=cap.end_in_seconds,  # Use float attribute
-        )
-        for cap in webvtt.read(subtitles_path)
-    ]
+    response = requests.get(video_url, timeout=10)
+    match = re.search(r'"channelId":"(UC[0-9A-Za-z_-]{22})"', response.text)
+    return match.group(1) if match else None
+
+
+def cached_channel_id(video_url: str, skip: SkipIndex) -> str | None:
+    """Channel ID remembered in the skip index, else scraped and remembered; None on failure."""
+    video_id = get_youtube_video_id(video_url)
+    channel_id = skip.channel(video_id) if video_id else None
+    if channel_id is None:
+        try:
+            channel_id = get_youtube_channel_id(video_url)
+        except Exception as e:
+            print(f"Could not determine channel: {e}")
+            return None
+        if channel_id and video_id:
+            skip.set_channel(video_id, channel_id)
+    return channel_id
+
+
+def fetch_transcript_api(url: str) -> Tuple[str, List[Subtitle]]:
+    """Fast path: YouTubeTranscriptApi captions + HTML title scrape."""
+    video_id = get_youtube_video_id(url)
+    if video_id is None:
+        raise ValueError(f"Could not extract a video ID from {url}")
+
+    from youtube_transcript_api import YouTubeTranscriptApi
+
+    if hasattr(YouTubeTranscriptApi, "get_transcript"):
+        entries = YouTubeTranscriptApi.get_transcript(video_id, languages=["en"])
+    else:  # youtube-transcript-api >= 1.0
+        entries = YouTubeTranscriptApi().fetch(video_id, languages=["en"]).to_raw_data()
+
+    words = split_words(cues_from_transcript_entries(entries))
+    return get_youtube_title(url), words.to_subtitles(Subtitle)
+
+
+def has_word_timing(subs: List[Subtitle]) -> bool:
+    """True if `subs` is non-empty and plausibly timed (ordered, non-negative)."""
+    if not subs:
+        return False
+    prev = float("-inf")
+    for sub in subs:
+        if sub.start < prev or sub.end < sub.start:
+            return False
+        prev = sub.start
+    return True
+
+
+JSON3_TIMEOUT_S = 45.0  # how long the line-timed fallback waits for real word timing
+JSON3_DEADLINE_RESERVE = 0.7  # with a deadline, stop waiting once less than this is left
+
+
+def acquire_transcript(
+    url: str,
+    cancel: CancelToken | None = None,
+    json3_timeout_s: float = JSON3_TIMEOUT_S,
+    deadline: Deadline | None = None,
+) -> Tuple[str, List[Subtitle], str]:
+    """
+    Return `(title, word_cues, source)`, preferring the Sieve downloader's
+    json3 transcript, which has real per-word timing. The transcript API
+    is fetched alongside it but only times whole caption lines (its word
+    times are interpolated), so it is used only if json3 fails, has no
+    usable timing, or hasn't arrived `json3_timeout_s` after the start (or
+    once less than JSON3_DEADLINE_RESERVE of the `deadline` is left, which
+    counts as a degradation). A transcript already in the artifact store
+    skips both.
+
+    Cancelling `cancel` (or settling on the fallback) cancels the
+    downloader's Sieve job, so it stops running and billing.
+    """
+    video_id = get_youtube_video_id(url)
+    if video_id is not None and get_artifact_store().get(video_id, JSON3):
+        try:
+            title, subtitles_path = download_video(url)
+            return title, load_subtitles_json3(subtitles_path), "artifact-store"
+        except FileNotFoundError:  # evicted meanwhile: fetch it again
+            pass
+
+    stop = CancelToken()  # also fired once a source is settled on
+    if cancel is not None:
+        cancel.on_cancel(lambda: stop.cancel(cancel.reason or "cancelled"))
+
+    def _from_downloader() -> Tuple[str, List[Subtitle]]:
+        title, subtitles_path = download_video(url, cancel=stop)
+        if subtitles_path is None:
+            return title, []
+        return title, load_subtitles_json3(subtitles_path)
+
+    pool = ThreadPoolExecutor(max_workers=2)
+    downloader = pool.submit(_from_downloader)
+    futures = {
+        pool.submit(fetch_transcript_api, url): "transcript-api",
+        downloader: "youtube-downloader",
+    }
+    pending = set(futures)
+    errors = []
+    fallback: Tuple[str, List[Subtitle], str] | None = None
+    give_up_at = time.monotonic() + json3_timeout_s
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+            for fut in done:
+                source = futures[fut]
+                if fut.exception() is not None:
+                    print(f"Transcript source {source} failed: {fut.exception()}")
+                    errors.append(fut.exception())
+                    continue
+                title, words = fut.result()
+                if not has_word_timing(words):
+                    print(f"Transcript source {source} had no usable word timing")
+                    continue
+                if source == "youtube-downloader":
+                    print(f"Using json3 transcript ({len(words)} words)")
+                    return title, words, source
+                fallback = (title, words, source)
+                print("Line-timed transcript API captions ready, waiting for json3")
+            if fallback is not None and time.monotonic() >= give_up_at:
+                print(f"No json3 transcript after {json3_timeout_s:.0f}s")
+                break
+            out_of_time = deadline is not None and deadline.low(JSON3_DEADLINE_RESERVE)
+            if fallback is not None and out_of_time:
+                deadline.degrade("line-timed captions instead of waiting for json3")
+                break
+    finally:
+        if not downloader.done():
+            stop.cancel("transcript source settled")
+        for fut in futures:
+            fut.cancel()
+        pool.shutdown(wait=False)
+
+    if fallback is not None:
+        print(f"Using line-timed transcript API captions ({len(fallback[1])} words)")
+        return fallback
+    if errors:
+        raise errors[-1]
+    raise ValueError(f"No transcript with word timing available for {url}")
 
 
 _PUNCT = ".?!,:;-—"  # feel free to tweak / extend
@@ -206,6 +361,25 @@ def group_subtitles_by_punctuation(
     return grouped
 
 
+def punctuation_heuristic_indices(
+    subs: List[Subtitle], punctuation: str = _PUNCT, max_words: int = 10
+) -> List[int]:
+    """
+    Group-closing indices under the same rule as
+    `group_subtitles_by_punctuation` (trailing punctuation or `max_words`).
+    """
+    ends: List[int] = []
+    run = 0
+    for i, cue in enumerate(subs):
+        run += 1
+        if (cue.text and cue.text[-1] in punctuation) or run >= max_words:
+            ends.append(i)
+            run = 0
+    if run:
+        ends.append(len(subs) - 1)
+    return ends
+
+
 SYSTEM_PROMPT = """
 You are an AI punctuation/phrase-boundary restorer.
 
@@ -251,13 +425,41 @@ You are an AI punctuation/phrase-boundary restorer.
   – Never propose an index that is **not** present in the chunk you were given.
 """
 
+PUNCTUATION_MODEL = "gpt-4o"
+PUNCTUATION_HEDGE_MODEL = "gemini-2.5-flash-preview-04-17"
+# part of the job key: checkpointed boundaries are only reused by the same prompt and models
+PUNCTUATION_VERSION = job_key(SYSTEM_PROMPT, PUNCTUATION_MODEL, PUNCTUATION_HEDGE_MODEL)[:8]
+
 
 def pick_punctuation(
     subtitles: List[Subtitle],
     chunk_size: int = 100,  # ← slide-window length
     overlap: int = 25,  # ← lines shared with the previous chunk
     max_workers: int = 20,
+    *,
+    hedge: HedgePolicy | None = None,
+    metrics: dict | None = None,
+    checkpoint: CheckpointStore | None = None,
+    cancel: CancelToken | None = None,
+    deadline: Deadline | None = None,
+    deadline_reserve: float = 0.4,
+    stream_completions: bool = False,
+    admission: JobAdmission | None = None,
 ) -> List[int]:
+    """
+    Ask the model for phrase-final word indices over overlapping chunks.
+
+    With `hedge`, straggling chunks are re-sent to Gemini and the first
+    answer wins; hedge stats are written into `metrics`. With `checkpoint`,
+    finished chunks are stored and skipped when the job is retried. A
+    cancelled `cancel` token (or a failed chunk) aborts the remaining chunks.
+    Chunks still outstanding when less than `deadline_reserve` of the
+    `deadline` budget is left use the local punctuation heuristic.
+    With `stream_completions`, answers are streamed and parsed as they
+    arrive (see `index_stream`), keeping what came in before a bad tail.
+    Calls are admitted through the shared scheduler as `admission`'s job.
+    The result is `Degraded` if any chunk's answer was (partial, heuristic).
+    """
     if overlap >= chunk_size:
         raise ValueError("`overlap` must be smaller than `chunk_size`")
 
@@ -283,12 +485,14 @@ def pick_punctuation(
             "Return the JSON described in the system prompt."
         )
 
-    def _call_model(batch: List[Tuple[int, Subtitle]], chunk_num: int) -> List[int]:
+    def _call_model(
+        batch: List[Tuple[int, Subtitle]], chunk_num: int, *, alternate: bool = False
+    ) -> List[int]:
         prompt = _build_prompt(batch, chunk_num)
         # print(prompt)
-        completion = openai_client.chat.completions.create(
-            # model="gemini-2.5-flash-preview-04-17",
-            model="gpt-4o",
+        client = get_gemini_client() if alternate else get_openai_client()
+        request = dict(
+            model=PUNCTUATION_HEDGE_MODEL if alternate else PUNCTUATION_MODEL,
             # model="gemini-2.5-pro-preview-05-06",
             # reasoning_effort="medium",
             messages=[
@@ -300,23 +504,52 @@ def pick_punctuation(
             ],
             response_format={"type": "json_object"},
         )
+        if stream_completions:
+            return stream_indices(client, **request)
+        completion = client.chat.completions.create(**request)
         data_raw = safe_json(completion.choices[0].message.content)
         # print(data)
         data = data_raw["result"]
         # print(f"Chunk {chunk_num} result, ", data)
         return data if isinstance(data, list) else data.get("indices", [])
 
+    def _call_alternate(batch: List[Tuple[int, Subtitle]], chunk_num: int) -> List[int]:
+        return _call_model(batch, chunk_num, alternate=True)
+
+    def _heuristic(batch: List[Tuple[int, Subtitle]], chunk_num: int) -> List[int]:
+        ends = punctuation_heuristic_indices([sub for _, sub in batch])
+        return [batch[i][0] for i in ends]
+
+    def _cost(batch: List[Tuple[int, Subtitle]]) -> int:
+        return estimate_tokens(_build_prompt(batch, 0), SYSTEM_PROMPT)
+
     # ────────── launch requests in parallel ──────────
     chosen: List[int] = []
-    with ThreadPoolExecutor(max_workers=min(max_workers, total_chunks)) as pool:
-        futures = {
-            pool.submit(_call_model, batch, i + 1): i for i, batch in enumerate(batches)
-        }
-        for future in as_completed(futures):
-            chosen.extend(map(int, future.result()))
+    partial = False
+    for result in run_chunks(
+        _call_model,
+        batches,
+        max_workers=max_workers,
+        hedge=hedge,
+        hedge_call=_call_alternate,
+        metrics=metrics,
+        checkpoint=(
+            checkpoint.chunks(f"punctuation-{chunk_size}-{overlap}")
+            if checkpoint is not None
+            else None
+        ),
+        cancel=cancel,
+        deadline=deadline,
+        deadline_reserve=deadline_reserve,
+        fallback=_heuristic,
+        admission=admission,
+        cost=_cost,
+    ):
+        chosen.extend(map(int, result))
+        partial = partial or isinstance(result, Degraded)
 
     # remove duplicates introduced by the 25-line overlap
-    return sorted(set(chosen))
+    return (Degraded if partial else list)(sorted(set(chosen)))
 
 
 def group_by_indices(subtitles: List[Subtitle], indices: List[int]) -> List[Subtitle]:
@@ -344,12 +577,100 @@ def group_by_indices(subtitles: List[Subtitle], indices: List[int]) -> List[Subt
     return new_subtitles
 
 
-def get_grouped_subtitles(url: str) -> List[Subtitle]:
-    title, vtt_path = download_video(url)
-    word_level = load_subtitles_json3(vtt_path)  # each cue == one token
+def get_grouped_subtitles(
+    url: str,
+    *,
+    hedge: HedgePolicy | None = None,
+    metrics: dict | None = None,
+    checkpoint: CheckpointStore | None = None,
+    cancel: CancelToken | None = None,
+    deadline: Deadline | None = None,
+    stream_completions: bool = False,
+    admission: JobAdmission | None = None,
+    reuse: TranscriptReuse | None = None,
+    skip: SkipIndex | None = None,
+) -> List[Subtitle]:
+    """
+    Word cues → LLM phrase boundaries → sentence-level cues.
+
+    With `checkpoint`, the word cues and boundary indices are saved as
+    stages and reused when the job is retried. The `deadline` caps the wait
+    for word timing (see `acquire_transcript`); if it is already running
+    low after the transcript, the LLM boundary pass is replaced by
+    `group_subtitles_by_punctuation`. With `reuse`, spans of the transcript
+    matching an already processed video take that video's boundaries and
+    only the remaining words go to the model. With `skip`, known sponsor /
+    intro / outro spans are cut from the word cues before anything else
+    sees them, and sentences never span a cut.
+    """
+    words = checkpoint.load("words") if checkpoint is not None else None
+    if words is not None:
+        title = words["title"]
+        word_level = [Subtitle(t, s, e) for t, s, e in words["cues"]]
+        cuts = words.get("cuts", [])
+    else:
+        channel = None
+        if skip is not None:  # scraped while the transcript downloads
+            pool = ThreadPoolExecutor(max_workers=1)
+            channel = pool.submit(cached_channel_id, url, skip)
+            pool.shutdown(wait=False)
+        # each cue == one token
+        title, word_level, _ = acquire_transcript(url, cancel, deadline=deadline)
+        if deadline is not None and deadline.degraded:
+            # a retry may get other words: nothing built on these is resumable
+            checkpoint = None
+        cuts = []
+        if channel is not None:
+            spans = known_skip_spans(
+                skip, get_youtube_video_id(url), channel.result(), word_level
+            )
+            word_level, cuts = drop_skipped(word_level, spans)
+        if checkpoint is not None:
+            checkpoint.save(
+                "words",
+                {
+                    "title": title,
+                    "cues": [[w.text, w.start, w.end] for w in word_level],
+                    "cuts": cuts,
+                },
+            )
     # print("word level", word_level)
-    punctuation_ends = pick_punctuation(word_level)
+    if reuse is not None:
+        reuse.begin([w.text for w in word_level], checkpoint)
+
+    punctuation_ends = checkpoint.load("boundaries") if checkpoint is not None else None
+    if punctuation_ends is None and deadline is not None and deadline.low(0.6):
+        deadline.degrade("local punctuation heuristic instead of LLM boundaries")
+        grouped, start = [], 0
+        for end in cuts + [len(word_level) - 1]:
+            grouped += group_subtitles_by_punctuation(word_level[start : end + 1])
+            start = end + 1
+        return grouped, title
+    if punctuation_ends is None:
+        reused, todo = reuse.boundaries() if reuse is not None else ([], range(len(word_level)))
+        picked, partial = [], False
+        if todo:
+            # the uncovered words, concatenated; local indices map back through `todo`
+            local = pick_punctuation(
+                [word_level[i] for i in todo],
+                hedge=hedge,
+                metrics=metrics,
+                checkpoint=checkpoint,
+                cancel=cancel,
+                deadline=deadline,
+                stream_completions=stream_completions,
+                admission=admission,
+            )
+            picked = [todo[i] for i in local if 0 <= i < len(todo)]
+            partial = isinstance(local, Degraded)  # never stored, here or for reuse
+        if partial and reuse is not None:
+            reuse.degraded = True
+        punctuation_ends = sorted(set(reused) | set(picked) | set(cuts))
+        if checkpoint is not None and not partial and not (deadline and deadline.degraded):
+            checkpoint.save("boundaries", punctuation_ends)
     # print(punctuation_ends)
+    if reuse is not None:
+        reuse.set_boundaries(punctuation_ends)
 
     sentence_level = group_by_indices(word_level, punctuation_ends)
     return sentence_level, title
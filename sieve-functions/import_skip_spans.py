@@ -0,0 +1,47 @@
+"""
+Import known sponsor/intro/outro spans into the local skip-span index.
+
+    python import_skip_spans.py sponsorTimes.csv --min-votes 1
+
+Reads a SponsorBlock database export (`sponsorTimes.csv`) or a JSON dump
+of segments per video. Re-running with a newer dump refreshes the spans of
+every video it contains; other videos keep theirs. Both Sieve functions
+cut these spans out before segmenting and diarizing.
+"""
+
+import argparse
+import time
+from typing import List
+
+from skip_spans import DEFAULT_CATEGORIES, get_skip_index, read_dump
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("dumps", nargs="+", help="CSV or JSON dump files")
+    parser.add_argument(
+        "--category",
+        action="append",
+        default=None,
+        help=f"categories to import (default: {', '.join(DEFAULT_CATEGORIES)})",
+    )
+    parser.add_argument("--min-votes", type=int, default=0, help="drop segments voted below this")
+    parser.add_argument("--source", default="dump", help="label replaced on refresh")
+    args = parser.parse_args(argv)
+
+    index = get_skip_index()
+    categories = args.category or DEFAULT_CATEGORIES
+    for path in args.dumps:
+        started = time.monotonic()
+        seen: set = set()
+        rows = read_dump(path, categories, args.min_votes, seen)
+        counts = index.import_rows(rows, args.source, refresh=seen)
+        print(
+            f"{path}: {counts['spans']} spans for {counts['videos']} of {len(seen)} videos "
+            f"in {time.monotonic() - started:.1f}s -> {index.path}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,104 @@
+from typing import List
+
+from chunk_runner import Degraded
+
+
+class IndexStreamParser:
+    """
+    Pulls integers out of the first JSON array in a response as it streams.
+
+    Fed arbitrary text fragments, `feed` returns the indices completed so
+    far — a number counts once the character after it has arrived, so a
+    truncated trailing number is never emitted. Anything before the first
+    `[` (keys, ```json fences) is skipped, as are quoted strings outside
+    the array; quoted numbers inside it ("12") are accepted. Parsing stops
+    at the array's closing `]`, so junk after it can't hurt.
+    """
+
+    def __init__(self):
+        self.closed = False  # saw the closing `]`
+        self._in_array = False
+        self._in_string = False
+        self._escape = False
+        self._string = ""
+        self._number = ""
+        self._fraction = False
+
+    def _flush(self, out: List[int], token: str) -> None:
+        if token and token != "-":
+            out.append(int(token))
+
+    def feed(self, text: str) -> List[int]:
+        out: List[int] = []
+        for ch in text:
+            if self.closed:
+                break
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._in_array and self._string.strip().lstrip("-").isdigit():
+                        self._flush(out, self._string.strip())
+                    self._string = ""
+                elif self._in_array:
+                    self._string += ch
+                continue
+            if ch == '"':
+                self._in_string = True
+                continue
+            if not self._in_array:
+                self._in_array = ch == "["
+                continue
+
+            if ch.isdigit() or (ch == "-" and not self._number):
+                if not self._fraction:
+                    self._number += ch
+                continue
+            if ch == "." and self._number:
+                self._fraction = True  # 12.0 → 12
+                continue
+            self._flush(out, self._number)
+            self._number, self._fraction = "", False
+            if ch == "]":
+                self.closed = True
+        return out
+
+
+def stream_indices(client, **request) -> List[int]:
+    """
+    Run a streamed chat completion and collect the indices it returns.
+
+    If the stream breaks off or the tail is malformed, the indices received
+    so far are returned as `Degraded` (used by this run, never stored);
+    only a response without any index raises `ValueError`.
+    """
+    parser = IndexStreamParser()
+    indices: List[int] = []
+    text: List[str] = []
+    stream = client.chat.completions.create(stream=True, **request)
+    try:
+        for event in stream:
+            if not event.choices:
+                continue
+            delta = event.choices[0].delta.content or ""
+            text.append(delta)
+            indices += parser.feed(delta)
+            if parser.closed:
+                break  # the rest can only be closing braces or junk
+    except Exception as e:
+        if not indices:
+            raise
+        print(f"Completion stream broke off after {len(indices)} indices: {e!r}")
+    finally:
+        if hasattr(stream, "close"):
+            stream.close()
+
+    if not parser.closed:
+        if not indices:
+            raise ValueError(f"No index list in streamed response: {''.join(text)[:200]!r}")
+        print(f"Malformed or truncated response, keeping {len(indices)} indices")
+        return Degraded(indices)
+    return indices
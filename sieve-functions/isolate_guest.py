@@ -1,11 +1,35 @@
 import os
 import time
 import re
-from typing import List, Dict, Tuple
+import zlib
+from array import array
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import TYPE_CHECKING, Callable, List, Dict, Tuple
+
 import sieve
-from dotenv import load_dotenv
+from artifact_store import SPEECH_SPANS, SPEECH_WAV, WAV, get_artifact_store
+from audio_preprocess import TimelineMap, preprocess_for_diarization
+from cancellation import CancelToken, register_job, release_job
+from checkpoints import job_key
+from clients import load_env
+from get_subtitles import cached_channel_id, download_video, load_subtitles_json3
+from sieve_jobs import push_job
+from singleflight import SingleFlight
+from skip_spans import Span, drop_skipped, get_skip_index, known_skip_spans
+from speaker_alignment import (
+    align_words_to_speakers,
+    host_scores,
+    merge_turns,
+    pick_host_by_text,
+)
+from voiceprint import ensure_pcm16k, get_host_registry, speaker_embeddings
+
+if TYPE_CHECKING:
+    import numpy as np  # only for annotations: voiceprint loads numpy on first use
 
-load_dotenv()
+
+WORDS_WAIT_S = 20.0  # how long diarization waits for the transcript's skip spans
+ENROLL_TEXT_MARGIN = 2.0  # transcript host score must beat the runner-up by this factor
 
 
 def extract_video_id(url: str) -> str:
@@ -14,75 +38,24 @@ def extract_video_id(url: str) -> str:
     return match.group(1) if match else None
 
 
-@sieve.function(
-    name="isolate-podcast-guest",
-    python_packages=[
-        "python-dotenv",
-    ],
-    system_packages=["ffmpeg"],
-)
-def isolate_podcast_guest(
-    youtube_video_url: str,
-):
+def download_audio(youtube_video_url: str, cancel: CancelToken | None = None) -> sieve.File:
     """
-    Process a podcast video to isolate only the guest speaker segments.
-    
-    This function:
-    1. Downloads the video from YouTube
-    2. Performs speaker diarization to identify different speakers
-    3. Analyzes which speaker is likely the guest (vs host)
-    4. Creates segments containing only the guest speaking
-    
-    Args:
-        youtube_video_url: YouTube URL of the podcast video
-        
-    Returns:
-        List of segments with guest-only timestamps
+    Return the WAV audio for diarization, downloading it through
+    `sieve/youtube-downloader` only if the artifact store doesn't have it.
+    Cancelling `cancel` cancels the download job.
     """
-    print(f"Processing podcast video: {youtube_video_url}")
-    start_time = time.time()
-    
-    # Step 1: Download video from YouTube using Sieve's youtube-downloader
-    print("Downloading video from YouTube...")
-    youtube_downloader = sieve.function.get("sieve/youtube-downloader")
-    
-    # Download video with audio
-    download_generator = youtube_downloader.run(
-        url=youtube_video_url,
-        download_type="video",
-        resolution="720p",  # 720p is good balance for processing speed
-        include_audio=True,
-        start_time=0,
-        end_time=-1,
-        include_metadata=False,
-        metadata_fields=[],
-        include_subtitles=False,
-        subtitle_languages=[],
-        video_format="mp4",
-        audio_format="mp3",
-        subtitle_format="vtt"
-    )
-    
-    # Extract the result from generator - need to consume all outputs
-    download_results = []
-    for output in download_generator:
-        print(f"Download output: {output}")
-        download_results.append(output)
-    
-    if not download_results:
-        raise Exception("Failed to download video - no results returned")
-    
-    # The last output should contain the video
-    download_result = download_results[-1]
-    print(f"Final download result type: {type(download_result)}")
-    print(f"Final download result: {download_result}")
-    
-    # The output is likely the file directly, not a dict
-    video_file = download_result
-    
-    # Step 2: Download audio separately for diarization
+    video_id = extract_video_id(youtube_video_url)
+    store = get_artifact_store()
+    if video_id is not None:
+        cached = store.get(video_id, WAV)
+        if cached is not None:
+            print(f"Using stored audio for {video_id}: {cached}")
+            return sieve.File(path=str(cached))
+
     print("Downloading audio for diarization...")
-    audio_generator = youtube_downloader.run(
+    audio_generator = push_job(
+        "sieve/youtube-downloader",
+        cancel,
         url=youtube_video_url,
         download_type="audio",
         resolution="highest-available",
@@ -97,25 +70,210 @@ def isolate_podcast_guest(
         audio_format="wav",  # WAV format for better diarization
         subtitle_format="vtt"
     )
-    
+
     # Extract the result from generator - need to consume all outputs
     audio_results = []
     for output in audio_generator:
         print(f"Audio download output: {output}")
         audio_results.append(output)
-    
+
     if not audio_results:
         raise Exception("Failed to download audio - no results returned")
-    
+
     # The last output should contain the audio
     audio_file = audio_results[-1]
-    print(f"Final audio result type: {type(audio_file)}")
     print(f"Final audio result: {audio_file}")
+
+    if video_id is not None:
+        store.put_file(video_id, WAV, audio_file.path)
+    return audio_file
+
+
+def prepare_diarization_audio(
+    youtube_video_url: str,
+    audio_file: sieve.File,
+    skip_before_s: float = 0.0,
+    skip: List[Span] = (),
+) -> Tuple[sieve.File, TimelineMap | None]:
+    """
+    Resample to 16 kHz mono and cut non-speech spans locally so less audio
+    is shipped to (and billed on) the GPU diarizer. Everything before
+    `skip_before_s` (a known host-only intro) and inside the `skip` spans
+    (sponsor reads, recurring intros) is cut as well.
+
+    Returns the file to diarize and the map from its timeline back to the
+    original one (None if preprocessing failed and the original is used).
+    """
+    video_id = extract_video_id(youtube_video_url)
+    store = get_artifact_store()
+    suffix = f"@{skip_before_s:.1f}" if skip_before_s > 0 else ""
+    if skip:
+        spans_key = "+".join(f"{s:.1f}-{e:.1f}" for s, e in skip)
+        suffix += f"@skip-{zlib.crc32(spans_key.encode()):08x}"
+    if video_id is not None:
+        cached = store.get(video_id, SPEECH_WAV + suffix)
+        spans = store.get_json(video_id, SPEECH_SPANS + suffix)
+        if cached is not None and spans is not None:
+            print(f"Using stored speech-only audio for {video_id}")
+            return sieve.File(path=str(cached)), TimelineMap.from_json(spans)
+
+    try:
+        trimmed_path, timeline = preprocess_for_diarization(
+            audio_file.path, skip_before_s=skip_before_s, skip=skip
+        )
+    except Exception as e:
+        print(f"Audio preprocessing failed, diarizing original audio: {e}")
+        return audio_file, None
+
+    if video_id is not None:
+        trimmed_path = str(store.put_file(video_id, SPEECH_WAV + suffix, trimmed_path))
+        store.put_json(video_id, SPEECH_SPANS + suffix, timeline.to_json())
+    return sieve.File(path=trimmed_path), timeline
+
+
+def episode_voiceprints(
+    diarized_file: sieve.File,
+    timeline: TimelineMap | None,
+    speakers: Dict[str, List[Tuple[float, float]]],
+) -> Dict[str, "np.ndarray"]:
+    """Per-speaker voiceprints read from the audio that was diarized."""
+    try:
+        if timeline is not None:
+            # the diarized file is already 16 kHz mono, on the trimmed timeline
+            wav_path = diarized_file.path
+            speakers = {
+                speaker_id: [(timeline.to_trimmed(s), timeline.to_trimmed(e)) for s, e in segs]
+                for speaker_id, segs in speakers.items()
+            }
+        else:
+            wav_path = ensure_pcm16k(diarized_file.path)
+        return speaker_embeddings(wav_path, speakers)
+    except Exception as e:
+        print(f"Could not compute speaker voiceprints: {e}")
+        return {}
+
+
+def intro_is_host(
+    audio_file: sieve.File, registry, channel_id: str, intro_s: float, threshold: float = 0.85
+) -> bool:
+    """Whether this episode's first `intro_s` seconds match the channel's host voiceprint."""
+    try:
+        wav_path = ensure_pcm16k(audio_file.path)
+        embedding = speaker_embeddings(wav_path, {"intro": [(0.0, intro_s)]}).get("intro")
+    except Exception as e:
+        print(f"Could not check the intro voice: {e}")
+        return False
+    similarity = registry.similarity(channel_id, embedding) if embedding is not None else 0.0
+    print(f"Intro voiceprint vs host: cosine {similarity:.3f}")
+    return similarity >= threshold
+
+
+def fetch_word_cues(youtube_video_url: str, cancel: CancelToken | None = None) -> list:
+    """Word-level json3 cues (shared with create-tldr-video), or [] if unavailable."""
+    try:
+        _, subtitles_path = download_video(youtube_video_url, cancel=cancel)
+        return load_subtitles_json3(subtitles_path) if subtitles_path else []
+    except Exception as e:
+        print(f"No word-level transcript, falling back to timing heuristics: {e}")
+        return []
+
+
+def _remember_edges(index, channel_id: str, video_id: str, words: list) -> None:
+    try:
+        index.remember_edges(channel_id, video_id, words)
+    except Exception as e:  # skipping is an optimisation, never a failure
+        print(f"Could not remember intro/outro of {video_id}: {e!r}")
+
+
+def run_guest_isolation(
+    youtube_video_url: str,
+    preprocess_audio: bool = True,
+    channel_id: str = "",
+):
+    """Pipeline body of `isolate_podcast_guest` (see its docstring)."""
+    load_env()
+    key = guest_job_key(youtube_video_url, preprocess_audio, channel_id)
+    cancel = register_job(key)
+    try:
+        return _run_guest_isolation(youtube_video_url, preprocess_audio, channel_id, cancel)
+    finally:
+        release_job(key)
+
+
+def guest_job_key(youtube_video_url: str, preprocess_audio: bool, channel_id: str) -> str:
+    return job_key(
+        "guest",
+        extract_video_id(youtube_video_url) or youtube_video_url,
+        preprocess_audio,
+        channel_id,
+    )
+
+
+def _run_guest_isolation(
+    youtube_video_url: str,
+    preprocess_audio: bool,
+    channel_id: str,
+    cancel: CancelToken,
+):
+    print(f"Processing podcast video: {youtube_video_url}")
+    start_time = time.time()
     
-    # Step 3: Perform speaker diarization
+    # The transcript downloads alongside the audio; it locates known skip
+    # spans before diarization and attributes words to speakers for
+    # text-based host detection
+    transcript_pool = ThreadPoolExecutor(max_workers=1)
+    words_future = transcript_pool.submit(fetch_word_cues, youtube_video_url, cancel)
+    transcript_pool.shutdown(wait=False)
+
+    # Step 1: Fetch diarization audio (shared artifact store, else youtube-downloader)
+    audio_file = download_audio(youtube_video_url, cancel)
+
+    # Recurring shows: a registered host's intro needn't be diarized at all
+    skip_index = get_skip_index()
+    channel_id = channel_id or cached_channel_id(youtube_video_url, skip_index)
+    registry = get_host_registry()
+    known_host = registry.get(channel_id) if channel_id else None
+    intro_s = registry.intro_skip(channel_id) if known_host and preprocess_audio else 0.0
+    # only skip once this episode's opening is verifiably the host talking
+    if intro_s > 0 and not intro_is_host(audio_file, registry, channel_id, intro_s):
+        intro_s = 0.0
+    if intro_s > 0:
+        print(f"Known channel {channel_id}: skipping {intro_s:.1f}s host intro")
+
+    # Sponsor reads and recurring intros/outros never reach the diarizer.
+    # Imported spans need no transcript; only matching earlier episodes'
+    # intros/outros does, so there is nothing to wait for without them.
+    skip: List[Span] = []
+    if preprocess_audio:
+        video_id = extract_video_id(youtube_video_url)
+        early_words = []
+        if channel_id and skip_index.has_edges(channel_id):
+            try:
+                early_words = words_future.result(timeout=WORDS_WAIT_S)
+            except FutureTimeout:
+                print(f"Transcript not ready after {WORDS_WAIT_S:.0f}s, using imported spans only")
+        if channel_id and video_id and not early_words:
+            # still remembered for the channel's next episodes, once it arrives
+            words_future.add_done_callback(
+                lambda f: _remember_edges(skip_index, channel_id, video_id, f.result())
+            )
+        skip = known_skip_spans(skip_index, video_id, channel_id, early_words)
+
+    timeline = None
+    if preprocess_audio:
+        audio_file, timeline = prepare_diarization_audio(
+            youtube_video_url, audio_file, skip_before_s=intro_s, skip=skip
+        )
+    if timeline is None:
+        intro_s = 0.0
+        skip = []
+
+    # Step 2: Perform speaker diarization
     print("Performing speaker diarization...")
-    diarizer = sieve.function.get("sieve/pyannote-diarization")
-    diarization_generator = diarizer.run(
+    # pushed, so a cancel stops the GPU job instead of waiting out its result
+    diarization_generator = push_job(
+        "sieve/pyannote-diarization",
+        cancel,
         audio=audio_file,
         start_time=0,
         end_time=-1,
@@ -123,25 +281,37 @@ def isolate_podcast_guest(
         max_speakers=-1
     )
     
-    # Collect all diarization outputs
-    diarization_outputs = []
-    for output in diarization_generator:
-        diarization_outputs.append(output)
-    
-    print(f"Total diarization outputs: {len(diarization_outputs)}")
-    
-    # Parse diarization results
-    speakers = parse_diarization_results(diarization_outputs)
-    
-    # Step 4: Identify host speaker (to exclude them)
+    # Consume turns as they stream in; per-speaker totals are kept running
+    # so host identification is ready as soon as diarization finishes
+    aggregator = SpeakerAggregator(timeline=timeline).consume(diarization_generator)
+    speakers = aggregator.as_dict()
+    print(f"Total diarization outputs: {aggregator.turns}")
+
+    # Step 3: Identify host speaker (to exclude them)
     # First, let's see what speakers we have
-    print(f"All speakers found: {list(speakers.keys())}")
-    for speaker_id, segs in speakers.items():
-        total_time = sum(end - start for start, end in segs)
-        print(f"Speaker {speaker_id}: {len(segs)} segments, {total_time:.2f}s total")
-    
-    # Try to identify the host
-    host_speaker = identify_host_speaker(speakers)
+    print(f"All speakers found: {list(aggregator.total)}")
+    for speaker_id, total_time in aggregator.total.items():
+        print(f"Speaker {speaker_id}: {aggregator.count[speaker_id]} segments, {total_time:.2f}s total")
+    
+    # Try to identify the host: voiceprint lookup first, then transcript/timing
+    voiceprints = episode_voiceprints(audio_file, timeline, speakers) if channel_id else {}
+    # how the host was found decides whether the registry may learn from it
+    host_speaker, host_source = None, None
+    if known_host:
+        host_speaker, similarity = registry.match(channel_id, voiceprints)
+        print(f"Host voiceprint match: {host_speaker} (cosine {similarity:.3f})")
+        host_source = "voiceprint" if host_speaker is not None else None
+
+    if host_speaker is None:
+        words, _ = drop_skipped(words_future.result(), skip)
+        text_scores = None
+        if words:
+            labels = align_words_to_speakers(words, merge_turns(speakers))
+            text_scores = host_scores(words, labels)
+            print(f"Host text scores: {text_scores}")
+        host_speaker = identify_host_speaker(aggregator.summary(), text_scores)
+        clear_text_host = pick_host_by_text(text_scores or {}, margin=ENROLL_TEXT_MARGIN)
+        host_source = "text" if clear_text_host and host_speaker == clear_text_host else "timing"
     
     # If we only have "unknown" speakers or similar issues, try a simpler approach
     if host_speaker == "unknown" or all(s == "unknown" for s in speakers.keys()):
@@ -153,11 +323,22 @@ def isolate_podcast_guest(
             host_speaker = "SPEAKER_01"
         else:
             # Just take the speaker with the most time as host
-            host_speaker = max(speakers.items(), key=lambda x: sum(end - start for start, end in x[1]))[0]
-    
-    print(f"Identified host speaker: {host_speaker}")
+            host_speaker = max(aggregator.total, key=aggregator.total.get)
+        host_source = "fallback"
     
-    # Step 5: Create segments for all speakers EXCEPT the host
+    print(f"Identified host speaker: {host_speaker} (by {host_source})")
+
+    if host_speaker in voiceprints and host_source in ("voiceprint", "text"):
+        # learn the host's voice and how long they talk before anyone else;
+        # timing guesses and fallbacks are never enrolled
+        others = [t for spk, t in aggregator.first.items() if spk != host_speaker]
+        registry.update(channel_id, voiceprints[host_speaker], min(others, default=0.0))
+    if intro_s > 0:
+        # the skipped intro belongs to the host
+        aggregator.add_turn(host_speaker, 0.0, intro_s)
+        speakers = aggregator.as_dict()
+    
+    # Step 4: Create segments for all speakers EXCEPT the host
     guest_segments = create_all_guest_segments(speakers, host_speaker)
     
     print(f"Processing complete. Time taken: {time.time() - start_time:.2f}s")
@@ -176,13 +357,13 @@ def isolate_podcast_guest(
     # Prepare speaker statistics for frontend
     speaker_stats = []
     for speaker_id, segs in speakers.items():
-        total_time = sum(end - start for start, end in segs)
-        avg_segment_length = total_time / len(segs) if segs else 0
+        total_time = aggregator.total[speaker_id]
+        count = aggregator.count[speaker_id]
         speaker_stats.append({
             "id": speaker_id,
             "totalTime": total_time,
-            "segmentCount": len(segs),
-            "avgSegmentLength": avg_segment_length,
+            "segmentCount": count,
+            "avgSegmentLength": total_time / count if count else 0,
             "segments": [{"start": s, "end": e} for s, e in segs]
         })
     
@@ -197,6 +378,158 @@ def isolate_podcast_guest(
     }
 
 
+# concurrent jobs for the same video + settings share one pipeline run
+_guest_flights = SingleFlight(memo_s=60.0)
+
+
+@sieve.function(
+    name="isolate-podcast-guest",
+    python_packages=[
+        "python-dotenv",
+        "openai",
+        "beautifulsoup4",
+        "youtube-transcript-api",
+        "numpy",
+    ],
+    system_packages=["ffmpeg"],
+)
+def isolate_podcast_guest(
+    youtube_video_url: str,
+    preprocess_audio: bool = True,
+    channel_id: str = "",
+):
+    """
+    Process a podcast video to isolate only the guest speaker segments.
+    
+    This function:
+    1. Downloads the audio from YouTube (reusing a stored copy if present)
+    2. Trims silence/non-speech and known sponsor/intro/outro spans
+       locally, then performs speaker diarization to identify different
+       speakers
+    3. Analyzes which speaker is likely the guest (vs host), by voiceprint
+       lookup for channels whose host is already registered
+    4. Creates segments containing only the guest speaking
+    
+    Args:
+        youtube_video_url: YouTube URL of the podcast video
+        preprocess_audio: Resample + VAD-trim the audio before diarization
+        channel_id: YouTube channel ID for the host registry (scraped if empty)
+        
+    Returns:
+        List of segments with guest-only timestamps
+    """
+    key = (extract_video_id(youtube_video_url) or youtube_video_url, preprocess_audio, channel_id)
+    return _guest_flights.do(
+        key,
+        lambda: run_guest_isolation(youtube_video_url, preprocess_audio, channel_id),
+    )
+
+
+def _turn_parser(segment) -> Callable[[object], Tuple[str, float, float]] | None:
+    """Pick the (speaker, start, end) extractor matching the diarizer's output format."""
+    if isinstance(segment, dict):
+        speaker_key = next((k for k in ("speaker_id", "speaker", "label") if k in segment), None)
+        start_key = "start" if "start" in segment else "start_time"
+        end_key = "end" if "end" in segment else "end_time"
+        return lambda seg: (
+            seg[speaker_key] if speaker_key else "unknown",
+            float(seg.get(start_key, 0)),
+            float(seg.get(end_key, 0)),
+        )
+    if hasattr(segment, 'speaker') and hasattr(segment, 'start') and hasattr(segment, 'end'):
+        # Handle object with attributes
+        return lambda seg: (seg.speaker, float(seg.start), float(seg.end))
+    if isinstance(segment, (list, tuple)) and len(segment) >= 3:
+        # Handle tuple/list format (start, end, speaker)
+        return lambda seg: (str(seg[2]), float(seg[0]), float(seg[1]))
+    return None
+
+
+class SpeakerAggregator:
+    """
+    Single-pass consumer of diarization turns.
+
+    The output format is detected from the first turn; after that each turn
+    is appended to compact per-speaker start/end arrays while total time,
+    turn count and first appearance are kept up to date. With a `timeline`,
+    turns from speech-only audio are mapped back to the original timeline
+    on the way in.
+    """
+
+    def __init__(self, timeline: TimelineMap | None = None):
+        self.timeline = timeline
+        self.starts: Dict[str, array] = {}
+        self.ends: Dict[str, array] = {}
+        self.total: Dict[str, float] = {}
+        self.count: Dict[str, int] = {}
+        self.first: Dict[str, float] = {}
+        self.turns = 0
+        self._parse = None
+
+    def add(self, segment) -> None:
+        if self.turns < 5:  # Print first 5 segments for debugging
+            print(f"Segment {self.turns} type: {type(segment)}, content: {segment}")
+        self.turns += 1
+
+        if self._parse is None:
+            self._parse = _turn_parser(segment)
+            if self._parse is None:
+                print(f"Unknown segment format: {segment}")
+                return
+        try:
+            speaker_id, start, end = self._parse(segment)
+        except (KeyError, AttributeError, TypeError, ValueError, IndexError):
+            print(f"Unknown segment format: {segment}")
+            return
+
+        intervals = (
+            self.timeline.map_interval(start, end)
+            if self.timeline is not None
+            else [(start, end)]
+        )
+        for s, e in intervals:
+            self.add_turn(speaker_id, s, e)
+
+    def add_turn(self, speaker_id: str, start: float, end: float) -> None:
+        """Record one turn already on the original timeline."""
+        if speaker_id not in self.starts:
+            self.starts[speaker_id] = array("d")
+            self.ends[speaker_id] = array("d")
+            self.total[speaker_id] = 0.0
+            self.count[speaker_id] = 0
+            self.first[speaker_id] = float("inf")
+        self.starts[speaker_id].append(start)
+        self.ends[speaker_id].append(end)
+        self.total[speaker_id] += end - start
+        self.count[speaker_id] += 1
+        self.first[speaker_id] = min(self.first[speaker_id], start)
+
+    def consume(self, turns) -> "SpeakerAggregator":
+        for segment in turns:
+            self.add(segment)
+        return self
+
+    def as_dict(self) -> Dict[str, List[Tuple[float, float]]]:
+        return {
+            speaker_id: sorted(zip(self.starts[speaker_id], self.ends[speaker_id]))
+            for speaker_id in self.starts
+        }
+
+    def summary(self) -> Dict[str, dict]:
+        return {
+            speaker_id: {
+                "speaker_id": speaker_id,
+                "total_duration": self.total[speaker_id],
+                "avg_segment_length": self.total[speaker_id] / self.count[speaker_id]
+                if self.count[speaker_id]
+                else 0,
+                "num_segments": self.count[speaker_id],
+                "first_appearance": self.first[speaker_id],
+            }
+            for speaker_id in self.starts
+        }
+
+
 def parse_diarization_results(diarization_result) -> Dict[str, List[Tuple[float, float]]]:
     """
     Parse the diarization results into a dictionary of speakers and their time segments.
@@ -204,89 +537,39 @@ def parse_diarization_results(diarization_result) -> Dict[str, List[Tuple[float,
     Returns:
         Dictionary mapping speaker IDs to lists of (start, end) tuples
     """
-    speakers = {}
-    
-    print(f"Diarization result type: {type(diarization_result)}")
-    print(f"First few diarization segments: {list(diarization_result)[:5] if hasattr(diarization_result, '__iter__') else diarization_result}")
-    
     # Handle both list and generator outputs
-    segments = list(diarization_result) if hasattr(diarization_result, '__iter__') else [diarization_result]
-    
-    # Debug: print first few segments to understand format
-    if segments:
-        print(f"Total segments: {len(segments)}")
-        print(f"First segment type: {type(segments[0])}")
-        print(f"First segment: {segments[0]}")
-        if hasattr(segments[0], '__dict__'):
-            print(f"First segment attributes: {segments[0].__dict__}")
-    
-    for i, segment in enumerate(segments):
-        if i < 5:  # Print first 5 segments for debugging
-            print(f"Segment {i} type: {type(segment)}, content: {segment}")
-        
-        # Handle different possible formats
-        if isinstance(segment, dict):
-            speaker_id = segment.get("speaker_id", segment.get("speaker", segment.get("label", "unknown")))
-            start = float(segment.get("start", segment.get("start_time", 0)))
-            end = float(segment.get("end", segment.get("end_time", 0)))
-        elif hasattr(segment, 'speaker') and hasattr(segment, 'start') and hasattr(segment, 'end'):
-            # Handle object with attributes
-            speaker_id = segment.speaker
-            start = float(segment.start)
-            end = float(segment.end)
-        elif isinstance(segment, (list, tuple)) and len(segment) >= 3:
-            # Handle tuple/list format (start, end, speaker)
-            start = float(segment[0])
-            end = float(segment[1])
-            speaker_id = str(segment[2]) if len(segment) > 2 else "unknown"
-        else:
-            print(f"Unknown segment format: {segment}")
-            print(f"Type: {type(segment)}")
-            if hasattr(segment, '__dict__'):
-                print(f"Attributes: {segment.__dict__}")
-            continue
-        
-        if speaker_id not in speakers:
-            speakers[speaker_id] = []
-        speakers[speaker_id].append((start, end))
-    
+    turns = diarization_result if hasattr(diarization_result, '__iter__') else [diarization_result]
+    speakers = SpeakerAggregator().consume(turns).as_dict()
     print(f"Parsed speakers: {list(speakers.keys())}")
-    for speaker, segs in speakers.items():
-        print(f"Speaker {speaker}: {len(segs)} segments, total duration: {sum(end-start for start,end in segs):.2f}s")
-    
     return speakers
 
 
-def identify_host_speaker(speakers: Dict[str, List[Tuple[float, float]]]) -> str:
+def identify_host_speaker(
+    speaker_stats: Dict[str, dict], text_scores: Dict[str, float] | None = None
+) -> str:
     """
     Identify which speaker is likely the host based on speaking patterns.
     
-    Heuristics:
+    If the speaker-attributed transcript clearly points at one speaker
+    (question density, show-running phrases), that speaker is the host.
+    Otherwise timing heuristics decide:
     1. Host usually speaks more total time than guests
     2. Host typically has more frequent, shorter segments (asking questions)
     3. Host often speaks first in podcasts
     
+    Args:
+        speaker_stats: Per-speaker running totals from `SpeakerAggregator.summary()`
+        text_scores: Optional per-speaker scores from `speaker_alignment.host_scores`
+    
     Returns:
         Speaker ID of the likely host
     """
-    if not speakers:
+    if not speaker_stats:
         return None
     
-    speaker_stats = {}
-    
-    for speaker_id, segments in speakers.items():
-        total_duration = sum(end - start for start, end in segments)
-        avg_segment_length = total_duration / len(segments) if segments else 0
-        num_segments = len(segments)
-        first_appearance = min(start for start, end in segments) if segments else float('inf')
-        
-        speaker_stats[speaker_id] = {
-            "speaker_id": speaker_id,
-            "total_duration": total_duration,
-            "avg_segment_length": avg_segment_length,
-            "num_segments": num_segments,
-            "first_appearance": first_appearance
-        }
+    text_host = pick_host_by_text(text_scores or {})
+    if text_host in speaker_stats:
+        return text_host
     
     # Sort by total duration (descending) - host likely speaks most
     sorted_by_duration = sorted(
@@ -0,0 +1,394 @@
+"""
+Load test: many concurrent TL;DR pipelines against local stand-ins.
+
+    python loadtest.py --jobs 40 --concurrency 8 --latency lognormal:1.5,0.6 --rate-limit 0.05
+
+A local HTTP server implements the chat-completions endpoint that both
+model clients use (OPENAI_BASE_URL / GEMINI_BASE_URL are pointed at it),
+with configurable latency per model, injected 429s and token accounting.
+`sieve.function.get("sieve/youtube-downloader")` is replaced by a fake that
+writes a synthetic json3 transcript, and the transcript-API fast path is
+switched off, so no job leaves the machine. Every job uses its own video ID
+and the run uses fresh artifact/checkpoint/fingerprint stores, so nothing
+is served from cache. The synthetic transcripts are identical and cycle
+through a short word list, so the fingerprint index is bypassed unless
+`--reuse` asks to measure it, and redundant-sentence pruning (which would
+drop most of every transcript before selection) unless `--prune` does.
+
+Reports jobs/min, p50/p95/p99 job latency, model calls, 429s, tokens/s and
+peak threads / RSS.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import re
+import resource
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List
+
+_INDEX_LINE = re.compile(r"^(\d+)\. ", re.MULTILINE)
+_WORDS = (
+    "so today we are going to talk about how the model actually works and "
+    "why it matters for you. first, the data. then, the results! what does "
+    "that mean? well, it depends on the setup, the budget, and the team."
+).split()
+
+
+def latency_sampler(spec: str, rng: random.Random) -> Callable[[], float]:
+    """
+    Parse `fixed:S`, `uniform:LO,HI` or `lognormal:MEDIAN,SIGMA` (seconds)
+    into a sampler.
+    """
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    if kind == "fixed" and len(values) == 1:
+        return lambda: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda: rng.uniform(values[0], values[1])
+    if kind == "lognormal" and len(values) == 2:
+        mu = math.log(values[0])
+        return lambda: rng.lognormvariate(mu, values[1])
+    raise ValueError(f"Bad latency spec {spec!r}")
+
+
+class MockLLM:
+    """Chat-completions stand-in: latency, 429 injection and token counts."""
+
+    def __init__(
+        self,
+        latency: str = "lognormal:1.0,0.5",
+        model_latency: Dict[str, str] | None = None,
+        rate_limit: float = 0.0,
+        seed: int = 0,
+    ):
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._default = latency_sampler(latency, self._rng)
+        self._by_model = {
+            model: latency_sampler(spec, self._rng)
+            for model, spec in (model_latency or {}).items()
+        }
+        self.rate_limit = rate_limit
+        self.lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "rate_limited": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+        }
+        self.by_model: Dict[str, int] = {}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def sample_latency(self, model: str) -> float:
+        with self._rng_lock:
+            return max(0.0, self._by_model.get(model, self._default)())
+
+    def rate_limited(self) -> bool:
+        with self._rng_lock:
+            return self._rng.random() < self.rate_limit
+
+    @staticmethod
+    def answer(body: dict) -> str:
+        prompt = body["messages"][-1]["content"]
+        if not body.get("response_format"):
+            return "Mock summary: the speaker explains the setup, the data and the results."
+        indices = [int(m) for m in _INDEX_LINE.findall(prompt)]
+        if "word-level subtitles" in prompt:  # phrase boundaries: every ~8th word
+            chosen = [i for i in indices if i % 8 == 7]
+        else:  # selection: keep runs of sentences
+            chosen = [i for i in indices if (i // 5) % 4 == 0]
+        return json.dumps({"result": chosen})
+
+    def record(self, model: str, prompt_tokens: int, completion_tokens: int) -> None:
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["prompt_tokens"] += prompt_tokens
+            self.stats["completion_tokens"] += completion_tokens
+            self.by_model[model] = self.by_model.get(model, 0) + 1
+
+
+def _handler(mock: MockLLM):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, payload: dict, headers: Dict[str, str] | None = None):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _stream(self, model: str, content: str):
+            """Server-sent events, a few characters per chunk."""
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            for i in range(0, len(content), 8):
+                event = {
+                    "id": "mock-stream",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "delta": {"content": content[i : i + 8]},
+                            "finish_reason": None,
+                        }
+                    ],
+                }
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.close_connection = True
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            if not self.path.endswith("/chat/completions"):
+                self._send(404, {"error": {"message": f"no route {self.path}"}})
+                return
+            model = body.get("model", "unknown")
+            if mock.rate_limited():
+                with mock.lock:
+                    mock.stats["rate_limited"] += 1
+                self._send(
+                    429,
+                    {"error": {"message": "rate limited (injected)", "type": "rate_limit"}},
+                    {"retry-after-ms": "200"},
+                )
+                return
+
+            with mock.lock:
+                mock.in_flight += 1
+                mock.peak_in_flight = max(mock.peak_in_flight, mock.in_flight)
+            try:
+                time.sleep(mock.sample_latency(model))
+            finally:
+                with mock.lock:
+                    mock.in_flight -= 1
+            content = mock.answer(body)
+            prompt_tokens = sum(len(str(m.get("content", ""))) for m in body["messages"]) // 4
+            completion_tokens = max(1, len(content) // 4)
+            mock.record(model, prompt_tokens, completion_tokens)
+            if body.get("stream"):
+                self._stream(model, content)
+                return
+            self._send(
+                200,
+                {
+                    "id": f"mock-{mock.stats['requests']}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens,
+                    },
+                },
+            )
+
+    return Handler
+
+
+class _File:
+    def __init__(self, path: str):
+        self.path = path
+
+
+class FakeDownloader:
+    """Stand-in for `sieve/youtube-downloader`: metadata, then a synthetic json3."""
+
+    def __init__(self, workdir: Path, words: int, latency_s: float):
+        self.workdir = workdir
+        self.words = words
+        self.latency_s = latency_s
+
+    def run(self, url: str, *args):
+        time.sleep(self.latency_s)
+        yield {"title": f"Load test video {url[-11:]}", "duration": self.words * 0.4}
+        events = []
+        for start in range(0, self.words, 10):
+            segs = [
+                {"utf8": (" " if i else "") + _WORDS[(start + i) % len(_WORDS)], "tOffsetMs": i * 400}
+                for i in range(min(10, self.words - start))
+            ]
+            events.append({"tStartMs": start * 400, "dDurationMs": len(segs) * 400, "segs": segs})
+        path = self.workdir / f"{url[-11:]}.en.json3"
+        path.write_text(json.dumps({"events": events}), encoding="utf-8")
+        yield {"en": _File(str(path))}
+
+
+def _rss_mb() -> float:
+    try:
+        pages = int(Path("/proc/self/statm").read_text().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=20, help="pipelines to run in total")
+    parser.add_argument("--concurrency", type=int, default=4, help="pipelines at once")
+    parser.add_argument("--mode", choices=["fast", "quality"], default="fast")
+    parser.add_argument("--words", type=int, default=3000, help="transcript length per video")
+    parser.add_argument("--latency", default="lognormal:1.0,0.5", help="default model latency")
+    parser.add_argument(
+        "--model-latency", action="append", default=[], metavar="MODEL=SPEC",
+        help="per-model latency override, e.g. gpt-4o=lognormal:2,0.6",
+    )
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="fraction of 429s")
+    parser.add_argument("--download-latency", type=float, default=2.0)
+    parser.add_argument(
+        "--llm-concurrency", type=int, default=0, help="admission cap (0: scheduler default)"
+    )
+    parser.add_argument("--hedge", action="store_true", help="hedge straggling chunks")
+    parser.add_argument("--stream", action="store_true", help="stream model answers")
+    parser.add_argument(
+        "--reuse", action="store_true", help="reuse results across duplicate transcripts"
+    )
+    parser.add_argument(
+        "--prune", action="store_true", help="prune near-duplicate and filler sentences"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, default=None, help="also write the report here")
+    parser.add_argument("--verbose", action="store_true", help="keep pipeline logs")
+    args = parser.parse_args(argv)
+
+    mock = MockLLM(
+        args.latency,
+        dict(spec.split("=", 1) for spec in args.model_latency),
+        args.rate_limit,
+        args.seed,
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(mock))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    workdir = Path(tempfile.mkdtemp(prefix="tldr-loadtest-"))
+    os.environ.update(
+        {
+            "OPENAI_BASE_URL": f"{base}/v1",
+            "GEMINI_BASE_URL": f"{base}/v1beta/openai/",
+            "OPENAI_API_KEY": "mock",
+            "GEMINI_API_KEY": "mock",
+            "TLDR_ARTIFACT_DIR": str(workdir / "artifacts"),
+            "TLDR_CHECKPOINT_DIR": str(workdir / "checkpoints"),
+            "TLDR_FINGERPRINT_DB": str(workdir / "fingerprints.sqlite"),
+        }
+    )
+
+    import get_subtitles
+    import sieve
+    from admission import get_scheduler
+    from chunk_runner import percentile
+    from create_video import run_tldr_pipeline
+
+    downloader = FakeDownloader(workdir, args.words, args.download_latency)
+    sieve.function.get = lambda name: downloader
+
+    def _no_transcript_api(url):
+        raise RuntimeError("transcript API disabled in load test")
+
+    get_subtitles.fetch_transcript_api = _no_transcript_api
+    if args.llm_concurrency:
+        get_scheduler().configure(max_calls=args.llm_concurrency)
+
+    latencies: List[float] = []
+    failures: List[str] = []
+    samples = {"threads": 0, "rss_mb": 0.0}
+    done = threading.Event()
+
+    def _sample():
+        while not done.is_set():
+            samples["threads"] = max(samples["threads"], threading.active_count())
+            samples["rss_mb"] = max(samples["rss_mb"], _rss_mb())
+            done.wait(0.25)
+
+    def _job(i: int) -> None:
+        url = f"https://www.youtube.com/watch?v=load{i:07d}"
+        started = time.monotonic()
+        try:
+            run_tldr_pipeline(
+                url,
+                args.mode,
+                "normal",
+                args.hedge,
+                stream_completions=args.stream,
+                reuse_duplicates=args.reuse,
+                prune_redundant=args.prune,
+                skip_known_spans=False,  # would scrape channel pages
+            )
+        except Exception as e:
+            failures.append(f"{url}: {e!r}")
+            return
+        latencies.append(time.monotonic() - started)
+
+    threading.Thread(target=_sample, daemon=True).start()
+    started = time.monotonic()
+    logs = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with logs, ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(_job, range(args.jobs)))
+    elapsed = time.monotonic() - started
+    done.set()
+    server.shutdown()
+
+    tokens = mock.stats["prompt_tokens"] + mock.stats["completion_tokens"]
+    report = {
+        "jobs": args.jobs,
+        "concurrency": args.concurrency,
+        "succeeded": len(latencies),
+        "failed": len(failures),
+        "elapsed_s": round(elapsed, 2),
+        "jobs_per_min": round(60 * len(latencies) / elapsed, 2),
+        "p50_s": round(percentile(latencies, 0.5), 2),
+        "p95_s": round(percentile(latencies, 0.95), 2),
+        "p99_s": round(percentile(latencies, 0.99), 2),
+        "model_requests": mock.stats["requests"],
+        "rate_limited": mock.stats["rate_limited"],
+        "requests_by_model": mock.by_model,
+        "peak_model_in_flight": mock.peak_in_flight,
+        "prompt_tokens": mock.stats["prompt_tokens"],
+        "completion_tokens": mock.stats["completion_tokens"],
+        "tokens_per_s": round(tokens / elapsed, 1),
+        "peak_threads": samples["threads"],
+        "peak_rss_mb": round(samples["rss_mb"], 1),
+    }
+    print(json.dumps(report, indent=2))
+    for failure in failures[:5]:
+        print(f"failed: {failure}", file=sys.stderr)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,126 @@
+from typing import List
+
+
+def _duration(segments: List[dict]) -> float:
+    return sum(seg["end"] - seg["start"] for seg in segments)
+
+
+def optimize_playback_plan(
+    segments: List[dict],
+    *,
+    max_gap_s: float = 0.75,
+    min_segment_s: float = 1.0,
+    max_added_ratio: float = 0.1,
+) -> List[dict]:
+    """
+    Turn kept segments into as few player seeks as possible.
+
+    Gaps shorter than `max_gap_s` are bridged (playing the skipped bit
+    instead of seeking over it), smallest first, until the bridged time
+    would exceed `max_added_ratio` of the kept duration — smallest-first
+    removes the most seeks for a given amount of added playback. Segments
+    still shorter than `min_segment_s` afterwards are dropped (the longest
+    one is always kept). `segments` must be sorted and non-overlapping, as
+    `convert_segments_to_dicts` returns them.
+    """
+    if len(segments) < 2:
+        return [dict(seg) for seg in segments]
+
+    budget = max_added_ratio * _duration(segments)
+    gaps = sorted(
+        (segments[i + 1]["start"] - segments[i]["end"], i)
+        for i in range(len(segments) - 1)
+    )
+    bridged = set()
+    added = 0.0
+    for gap, i in gaps:
+        if gap >= max_gap_s or added + max(gap, 0.0) > budget:
+            break
+        bridged.add(i)
+        added += max(gap, 0.0)
+
+    merged: List[dict] = [dict(segments[0])]
+    for i, seg in enumerate(segments[1:]):
+        if i in bridged:
+            merged[-1]["end"] = seg["end"]
+        else:
+            merged.append(dict(seg))
+
+    plan = [seg for seg in merged if seg["end"] - seg["start"] >= min_segment_s]
+    if not plan:
+        plan = [max(merged, key=lambda seg: seg["end"] - seg["start"])]
+
+    print(
+        f"Playback plan: {len(segments)} → {len(plan)} segments, "
+        f"+{added:.1f}s bridged, {_duration(merged) - _duration(plan):.1f}s "
+        f"of short fragments dropped"
+    )
+    return plan
+
+
+class PlaybackPlanStream:
+    """
+    `optimize_playback_plan` for segments that arrive one at a time.
+
+    The last segment is held back until the next one (and so the gap after
+    it) is known, or until `finish`. Gaps are bridged in timeline order
+    rather than smallest first, against a budget of `max_added_ratio` of
+    the kept duration seen so far; fragments are dropped as in the batch
+    plan, except that the longest-one fallback only applies when nothing
+    at all was emitted.
+    """
+
+    def __init__(
+        self, *, max_gap_s: float = 0.75, min_segment_s: float = 1.0, max_added_ratio: float = 0.1
+    ):
+        self.max_gap_s = max_gap_s
+        self.min_segment_s = min_segment_s
+        self.max_added_ratio = max_added_ratio
+        self._held: dict | None = None
+        self._longest: dict | None = None
+        self._seen = 0
+        self._emitted = 0
+        self._kept_s = 0.0
+        self._added = 0.0
+        self._dropped_s = 0.0
+
+    def push(self, segment: dict) -> List[dict]:
+        """Adds the next segment; returns the segments that became final."""
+        self._seen += 1
+        self._kept_s += segment["end"] - segment["start"]
+        held, self._held = self._held, dict(segment)
+        if held is None:
+            return []
+        gap = max(segment["start"] - held["end"], 0.0)
+        budget = self.max_added_ratio * self._kept_s
+        if segment["start"] - held["end"] < self.max_gap_s and self._added + gap <= budget:
+            self._added += gap
+            self._held["start"] = held["start"]
+            return []
+        return self._settle(held)
+
+    def finish(self) -> List[dict]:
+        """Flushes the held segment; call once, after the last `push`."""
+        out = self._settle(self._held) if self._held is not None else []
+        self._held = None
+        if not self._emitted and self._longest is not None:
+            self._dropped_s -= self._longest["end"] - self._longest["start"]
+            out = [self._longest]
+            self._emitted = 1
+        if self._seen:
+            print(
+                f"Playback plan (streamed): {self._seen} → {self._emitted} segments, "
+                f"+{self._added:.1f}s bridged, {self._dropped_s:.1f}s "
+                f"of short fragments dropped"
+            )
+        return out
+
+    def _settle(self, segment: dict) -> List[dict]:
+        duration = segment["end"] - segment["start"]
+        if duration >= self.min_segment_s:
+            self._emitted += 1
+            return [segment]
+        self._dropped_s += duration
+        if self._longest is None or duration > self._longest["end"] - self._longest["start"]:
+            self._longest = segment
+        return []
@@ -0,0 +1,74 @@
+import re
+import zlib
+from typing import Dict, List, Sequence, Tuple
+
+from fingerprint_index import BANDS, NUM_PERM, minhash, normalize
+
+# a sentence made only of these says nothing on its own; answers ("yes",
+# "right", "okay") are left out, since a one-word reply can be the point
+FILLER_WORDS = {
+    "ah", "and", "anyway", "basically", "but", "er", "erm", "hmm", "huh", "like",
+    "literally", "mhm", "mm", "oh", "uh", "uhm", "um", "well", "wow",
+}  # fmt: skip
+_FILLER_PHRASES = re.compile(r"\b(?:you know|i mean|kind of|sort of)\b")
+
+
+def is_filler(text: str) -> bool:
+    tokens = _FILLER_PHRASES.sub(" ", " ".join(normalize(w) for w in text.split())).split()
+    return all(token in FILLER_WORDS for token in tokens)
+
+
+def near_duplicates(
+    texts: Sequence[str], threshold: float = 0.7, min_words: int = 5
+) -> List[int]:
+    """
+    Indices of sentences whose word-bigram set is at least `threshold`
+    similar (estimated Jaccard) to a later sentence. The last occurrence
+    is kept: an early copy is usually the cold-open teaser or a "coming
+    up" recap of the discussion it repeats. Sentences under `min_words`
+    words are never matched, since short sentences repeat naturally.
+    """
+    rows: List[int] = []
+    shingles: List[List[int]] = []
+    for i, text in enumerate(texts):
+        tokens = [t for t in (normalize(w) for w in text.split()) if t]
+        if len(tokens) >= min_words:
+            rows.append(i)
+            bigrams = {f"{x} {y}" for x, y in zip(tokens, tokens[1:])}
+            shingles.append(sorted(zlib.crc32(bigram.encode("utf-8")) for bigram in bigrams))
+    if len(rows) < 2:
+        return []
+    import numpy as np  # deferred like in fingerprint_index
+
+    hashes = np.fromiter((h for row in shingles for h in row), dtype=np.uint64)
+    signatures = minhash(hashes, np.cumsum([0] + [len(row) for row in shingles[:-1]]))
+
+    # LSH, from the end: rows sharing any band bucket with a later row are candidates
+    per_band = NUM_PERM // BANDS
+    buckets: Dict[Tuple[int, bytes], List[int]] = {}
+    candidates: List[List[int]] = [[] for _ in rows]
+    for r in reversed(range(len(rows))):
+        for band in range(BANDS):
+            members = buckets.setdefault(
+                (band, signatures[r, band * per_band : (band + 1) * per_band].tobytes()), []
+            )
+            candidates[r] += members
+            members.append(r)
+
+    duplicates: List[int] = []
+    for r, later in enumerate(candidates):
+        if not later:
+            continue
+        later = sorted(set(later))
+        similarity = (signatures[later] == signatures[r]).mean(axis=1)
+        if similarity.max() >= threshold:
+            duplicates.append(rows[r])
+    return duplicates
+
+
+def redundant_sentences(
+    texts: Sequence[str], threshold: float = 0.7
+) -> Tuple[List[int], List[int]]:
+    """(near-duplicate indices, filler indices) of sentence-level subtitles."""
+    filler = [i for i, text in enumerate(texts) if is_filler(text)]
+    return near_duplicates(texts, threshold), filler
@@ -1,23 +1,14 @@
 import json
-import os
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Literal, Tuple
+from typing import Callable, List, Literal, Tuple
 
-import openai
-from dotenv import load_dotenv
-
-load_dotenv()
-
-openai_client = openai.OpenAI(
-    api_key=os.getenv("OPENAI_API_KEY"),
-    base_url="https://api.openai.com/v1",
-)
-
-gemini_client = openai.OpenAI(
-    api_key=os.getenv("GEMINI_API_KEY"),
-    base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
-)
+from admission import JobAdmission, estimate_tokens
+from cancellation import CancelToken
+from checkpoints import CheckpointStore, job_key
+from chunk_runner import Degraded, HedgePolicy, run_chunks
+from clients import get_gemini_client, get_openai_client
+from deadline import Deadline
+from index_stream import stream_indices
 
 
 def get_adhd_length(adhd_level: Literal["relaxed", "normal", "hyper"]) -> str:
@@ -71,10 +62,14 @@ SUMMARY_SYSTEM_PROMPT = """You are an AI summarizer, that takes in a transcript
                 who are watching the video are trying to figure out."""
 
 
-def generate_summary(subtitles: List[Subtitle], title) -> str:
+SUMMARY_MODEL = "gpt-4o"
+
+
+def generate_summary(subtitles: List[Subtitle], title, timeout_s: float | None = None) -> str:
+    """Summary of the transcript; `TimeoutError` if not answered within `timeout_s`."""
     joined_subs = "\n".join(f"{i + 1}. {obj.text}" for i, obj in enumerate(subtitles))
-    completion = openai_client.chat.completions.create(
-        model="gpt-4o",
+    request = dict(
+        model=SUMMARY_MODEL,
         messages=[
             {
                 "role": "user",
@@ -89,6 +84,19 @@ def generate_summary(subtitles: List[Subtitle], title) -> str:
             },
         ],
     )
+    client = get_openai_client()
+    if timeout_s is not None:
+        # one bounded attempt: retries would multiply the wait
+        client = client.with_options(max_retries=0)
+        request["timeout"] = max(timeout_s, 0.1)
+    try:
+        completion = client.chat.completions.create(**request)
+    except Exception as e:
+        from openai import APITimeoutError  # deferred like the client itself
+
+        if timeout_s is not None and isinstance(e, APITimeoutError):
+            raise TimeoutError(f"no summary within {timeout_s:.1f}s") from e
+        raise
 
     return completion.choices[0].message.content
 
@@ -121,6 +129,30 @@ in the video. For example:
 }
 """
 
+# selection models: OpenAI and Gemini per mode, the other provider hedges
+FAST_MODEL = "gpt-4o"
+FAST_HEDGE_MODEL = "gemini-2.5-flash-preview-04-17"
+QUALITY_MODEL = "gemini-2.5-pro-preview-05-06"
+QUALITY_HEDGE_MODEL = "gpt-4o"
+DEADLINE_MODEL = "gpt-4o-mini"
+# part of the job key: a checkpointed summary or selection is only reused
+# by the same prompts and models
+SELECTION_VERSION = job_key(
+    SUMMARY_SYSTEM_PROMPT,
+    SUMMARY_MODEL,
+    SYSTEM_PROMPT,
+    FAST_MODEL,
+    FAST_HEDGE_MODEL,
+    QUALITY_MODEL,
+    QUALITY_HEDGE_MODEL,
+)[:8]
+
+
+def chunk_windows(n: int, chunk_size: int, overlap: int) -> List[Tuple[int, int]]:
+    """[start, end) subtitle ranges of the overlapping windows `pick_segments` sends."""
+    step = chunk_size - overlap  # how far we advance the window
+    return [(start, min(start + chunk_size, n)) for start in range(0, n, step)]
+
 
 def pick_segments(
     subtitles: List[Subtitle],
@@ -132,25 +164,45 @@ def pick_segments(
     chunk_size: int = 100,  # ← slide-window length
     overlap: int = 25,  # ← lines shared with the previous chunk
     max_workers: int = 20,
+    hedge: HedgePolicy | None = None,
+    metrics: dict | None = None,
+    checkpoint: CheckpointStore | None = None,
+    cancel: CancelToken | None = None,
+    deadline: Deadline | None = None,
+    on_chunk: Callable[[int, List[int]], None] | None = None,
+    stream_completions: bool = False,
+    admission: JobAdmission | None = None,
 ) -> List[int]:
     """
     Break `subtitles` into overlapping chunks (`chunk_size`, `overlap`)
     and ask Gemini which subtitle indices to keep.
 
-    The result list is deduplicated and sorted.
+    With `hedge`, straggling chunks are re-sent to the other provider
+    (OpenAI ↔ Gemini) and the first answer wins; hedge stats are written
+    into `metrics`. With `checkpoint`, finished chunks are stored and
+    skipped when the job is retried. A cancelled `cancel` token (or a
+    failed chunk) aborts the remaining chunks.
+
+    With `deadline`, chunks started in the last quarter of the budget go
+    to a faster model, and chunks still missing right at the end keep all
+    of their lines rather than holding up the job.
+
+    `on_chunk(chunk, indices)` is called as each window's answer comes in
+    (windows as laid out by `chunk_windows`). With `stream_completions`,
+    answers are streamed and parsed incrementally (see `index_stream`).
+    Calls are admitted through the shared scheduler as `admission`'s job.
+
+    The result list is deduplicated and sorted; it is `Degraded` if any
+    chunk's answer was (a faster model, a truncated stream).
     """
     if overlap >= chunk_size:
         raise ValueError("`overlap` must be smaller than `chunk_size`")
 
-    step = chunk_size - overlap  # how far we advance the window
-    batches: List[List[Tuple[int, Subtitle]]] = []
-
     # ────────── build overlapping batches ──────────
-    start = 0
-    while start < len(subtitles):
-        end = min(start + chunk_size, len(subtitles))
-        batches.append([(i, subtitles[i]) for i in range(start, end)])
-        start += step  # slide the window forward
+    batches: List[List[Tuple[int, Subtitle]]] = [
+        [(i, subtitles[i]) for i in range(start, end)]
+        for start, end in chunk_windows(len(subtitles), chunk_size, overlap)
+    ]
 
     total_chunks = len(batches)
 
@@ -167,54 +219,91 @@ def pick_segments(
             f"Summary: {summary}\n"
         )
 
-    def _call_model(batch: List[Tuple[int, Subtitle]], chunk_num: int) -> List[int]:
+    def _call_model(
+        batch: List[Tuple[int, Subtitle]], chunk_num: int, *, alternate: bool = False
+    ) -> List[int]:
         prompt = _build_prompt(batch, chunk_num)
-        if mode == "fast":
-            completion = openai_client.chat.completions.create(
-                # model="gemini-2.5-flash-preview-04-17",
-                model="gpt-4o",
-                # model="gemini-2.5-pro-preview-05-06",
-                # reasoning_effort="medium",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": SYSTEM_PROMPT.replace(
-                            "VIDEO_REDUCTION_AMOUNT", get_adhd_length(adhd_level)
-                        ),
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                response_format={"type": "json_object"},
-            )
+        # answers of the faster model are used but never checkpointed
+        degraded = False
+        if deadline is not None and deadline.low(0.25):
+            degraded = True
+            deadline.degrade(f"faster selection model ({DEADLINE_MODEL})")
+            client, model = get_openai_client(), DEADLINE_MODEL
+        elif alternate:
+            # hedge on the other provider so a provider-wide slowdown
+            # doesn't hit both attempts
+            if mode == "fast":
+                client, model = get_gemini_client(), FAST_HEDGE_MODEL
+            else:
+                client, model = get_openai_client(), QUALITY_HEDGE_MODEL
+        elif mode == "fast":
+            # model="gemini-2.5-flash-preview-04-17",
+            # model="gemini-2.5-pro-preview-05-06",
+            # reasoning_effort="medium",
+            client, model = get_openai_client(), FAST_MODEL
         else:
-            completion = gemini_client.chat.completions.create(
-                model="gemini-2.5-pro-preview-05-06",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": SYSTEM_PROMPT.replace(
-                            "VIDEO_REDUCTION_AMOUNT", get_adhd_length(adhd_level)
-                        ),
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                response_format={"type": "json_object"},
-            )
+            client, model = get_gemini_client(), QUALITY_MODEL
+
+        request = dict(
+            model=model,
+            messages=[
+                {
+                    "role": "user",
+                    "content": SYSTEM_PROMPT.replace(
+                        "VIDEO_REDUCTION_AMOUNT", get_adhd_length(adhd_level)
+                    ),
+                },
+                {"role": "user", "content": prompt},
+            ],
+            response_format={"type": "json_object"},
+        )
+        if stream_completions:
+            data = stream_indices(client, **request)
+            print(f"Chunk {chunk_num} result, ", data)
+            return Degraded(data) if degraded else data  # partial answers are Degraded already
+        completion = client.chat.completions.create(**request)
 
         data_raw = safe_json(completion.choices[0].message.content)
         # print(data)
         data = data_raw["result"]
         print(f"Chunk {chunk_num} result, ", data)
-        return data if isinstance(data, list) else data.get("indices", [])
+        data = data if isinstance(data, list) else data.get("indices", [])
+        return Degraded(data) if degraded else data
+
+    def _call_alternate(batch: List[Tuple[int, Subtitle]], chunk_num: int) -> List[int]:
+        return _call_model(batch, chunk_num, alternate=True)
+
+    def _keep_all(batch: List[Tuple[int, Subtitle]], chunk_num: int) -> List[int]:
+        return [idx for idx, _ in batch]
+
+    def _cost(batch: List[Tuple[int, Subtitle]]) -> int:
+        return estimate_tokens(_build_prompt(batch, 0), SYSTEM_PROMPT)
 
     # ────────── launch requests in parallel ──────────
     chosen: List[int] = []
-    with ThreadPoolExecutor(max_workers=min(max_workers, total_chunks)) as pool:
-        futures = {
-            pool.submit(_call_model, batch, i + 1): i for i, batch in enumerate(batches)
-        }
-        for future in as_completed(futures):
-            chosen.extend(map(int, future.result()))
+    partial = False
+    for result in run_chunks(
+        _call_model,
+        batches,
+        max_workers=max_workers,
+        hedge=hedge,
+        hedge_call=_call_alternate,
+        metrics=metrics,
+        checkpoint=(
+            checkpoint.chunks(f"selection-{chunk_size}-{overlap}")
+            if checkpoint is not None
+            else None
+        ),
+        cancel=cancel,
+        deadline=deadline,
+        deadline_reserve=0.05,
+        fallback=_keep_all,
+        admission=admission,
+        cost=_cost,
+        on_result=on_chunk,
+    ):
+        chosen.extend(map(int, result))
+        partial = partial or isinstance(result, Degraded)
 
     # remove duplicates introduced by the 25-line overlap
-    return sorted(set(chosen))
+    return (Degraded if partial else list)(sorted(set(chosen)))
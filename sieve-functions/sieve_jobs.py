@@ -0,0 +1,81 @@
+"""
+Child Sieve jobs (youtube-downloader, pyannote-diarization) that stop
+running, and billing, when the job that started them is cancelled.
+
+Closing a `.run()` generator only stops reading the outputs; the remote
+job carries on to completion. `push_job` starts the job with `.push()`
+instead and cancels it through the jobs API (the endpoint the frontend's
+`cancelJob` uses) from an `on_cancel` callback.
+"""
+
+import os
+import threading
+import urllib.request
+from typing import Iterator
+
+from cancellation import CancelToken
+from clients import load_env
+
+SIEVE_API_URL = "https://mango.sievedata.com/v2"
+CANCEL_TIMEOUT_S = 10.0
+
+
+def cancel_sieve_job(job_id: str) -> bool:
+    """Cancel a Sieve job through the jobs API (SIEVE_API_KEY, else SIEVE_KEY)."""
+    load_env()
+    api_key = os.getenv("SIEVE_API_KEY") or os.getenv("SIEVE_KEY")
+    if not api_key:
+        print(f"No Sieve API key, child job {job_id} keeps running")
+        return False
+    request = urllib.request.Request(
+        f"{SIEVE_API_URL}/jobs/{job_id}/cancel",
+        method="POST",
+        headers={"X-API-Key": api_key},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=CANCEL_TIMEOUT_S):
+            pass
+    except Exception as e:
+        print(f"Could not cancel child job {job_id}: {e}")
+        return False
+    print(f"Cancelled child job {job_id}")
+    return True
+
+
+def push_job(function_name: str, cancel: CancelToken | None, *args, **kwargs) -> Iterator:
+    """
+    Start `function_name` with `.push()` and return an iterator over its
+    outputs.
+
+    Once `cancel` fires, the remote job is cancelled (unless all of its
+    outputs were already read) and iterating raises `Cancelled`, also when
+    the job ends early or fails because of it.
+    """
+    import sieve
+
+    future = sieve.function.get(function_name).push(*args, **kwargs)
+    job_id = (getattr(future, "job", None) or {}).get("id")
+    finished = threading.Event()
+
+    def _cancel_remote() -> None:
+        if job_id and not finished.is_set():
+            cancel_sieve_job(job_id)
+
+    if cancel is not None:
+        cancel.on_cancel(_cancel_remote)
+    return _outputs(future, cancel, finished)
+
+
+def _outputs(future, cancel: CancelToken | None, finished: threading.Event) -> Iterator:
+    try:
+        for output in future.result():
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+            yield output
+    except Exception:
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        raise
+    finished.set()
+    if cancel is not None:
+        cancel.raise_if_cancelled()
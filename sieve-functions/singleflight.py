@@ -0,0 +1,67 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+        self.finished_at = 0.0
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key onto one execution.
+
+    The first caller for a key runs `fn`; callers arriving while it is in
+    flight block and receive the same result (or exception). Successful
+    results stay memoised for `memo_s` seconds after completion so
+    near-simultaneous duplicates don't start a second run either.
+    """
+
+    def __init__(self, memo_s: float = 60.0):
+        self.memo_s = memo_s
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            self._expire()
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            print(f"Joining in-flight run for {key} ({call.waiters} waiting)")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self._calls.pop(key, None)  # failures are not memoised
+            raise
+        finally:
+            call.finished_at = time.monotonic()
+            call.done.set()
+        return call.result
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        stale = [
+            key
+            for key, call in self._calls.items()
+            if call.done.is_set() and now - call.finished_at > self.memo_s
+        ]
+        for key in stale:
+            del self._calls[key]
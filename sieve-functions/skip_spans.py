@@ -0,0 +1,259 @@
+import csv
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Sequence, Set, Tuple
+
+from fingerprint_index import align, normalize
+
+DEFAULT_PATH = Path.home() / ".cache" / "tldr-tube" / "skip_spans.sqlite"
+
+# SponsorBlock categories that are never content worth keeping
+DEFAULT_CATEGORIES = ("sponsor", "selfpromo", "intro", "outro", "interaction")
+
+EDGE_S = 180.0  # recurring intros/outros are looked for this close to either end
+MIN_RECURRING_WORDS = 12
+KEEP_EPISODES = 8  # per channel and position
+
+Span = Tuple[float, float]
+
+
+def merge_spans(spans: Iterable[Span], gap_s: float = 0.5) -> List[Span]:
+    merged: List[Span] = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1] + gap_s:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def drop_skipped(words: list, spans: Sequence[Span]) -> Tuple[list, List[int]]:
+    """
+    Cues whose midpoint falls outside every span, plus the index (in the
+    returned list) of the last cue before each cut, so that sentence
+    grouping can be forced to break there instead of joining text from
+    both sides of a removed sponsor read.
+    """
+    if not spans:
+        return words, []
+    kept: list = []
+    cuts: List[int] = []
+    for word in words:
+        mid = (word.start + word.end) / 2
+        if any(start <= mid < end for start, end in spans):
+            if kept and (not cuts or cuts[-1] != len(kept) - 1):
+                cuts.append(len(kept) - 1)
+            continue
+        kept.append(word)
+    return kept, cuts
+
+
+def read_dump(
+    path: str | Path,
+    categories: Sequence[str] = DEFAULT_CATEGORIES,
+    min_votes: int = 0,
+    seen: Set[str] | None = None,
+) -> Iterator[Tuple[str, float, float, str]]:
+    """
+    (video ID, start, end, category) rows from a SponsorBlock-style dump:
+    the `sponsorTimes.csv` database export, or JSON — a list of objects
+    with `videoID` and `segment: [start, end]` (or `startTime`/`endTime`),
+    or an object mapping video IDs to such lists. Hidden, downvoted and
+    non-skip segments are left out; every video ID in the dump, kept
+    rows or not, is added to `seen`.
+    """
+    path = Path(path)
+    with open(path, encoding="utf-8", newline="") as fh:
+        if path.suffix.lower() == ".json":
+            data = json.load(fh)
+            if isinstance(data, dict):
+                items = ({**item, "videoID": vid} for vid, seg in data.items() for item in seg)
+            else:
+                items = iter(data)
+        else:
+            items = csv.DictReader(fh)
+        for item in items:
+            if seen is not None:
+                seen.add(item["videoID"])
+            if item.get("category", "sponsor") not in categories:
+                continue
+            if item.get("actionType", "skip") not in ("skip", ""):
+                continue
+            if str(item.get("hidden", "0")) == "1" or str(item.get("shadowHidden", "0")) == "1":
+                continue
+            if int(item.get("votes", 0) or 0) < min_votes:
+                continue
+            if "segment" in item:
+                start, end = item["segment"]
+            else:
+                start, end = item["startTime"], item["endTime"]
+            start, end = float(start), float(end)
+            if end > start:
+                yield item["videoID"], start, end, item.get("category", "sponsor")
+
+
+class SkipIndex:
+    """
+    Known non-content spans: per-video skip spans imported from dumps, and
+    per-channel opening/closing transcripts for spotting recurring intros
+    and outros. SQLite, so several processes can share one file.
+    """
+
+    def __init__(self, path: str | Path = DEFAULT_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS spans "
+                "(video TEXT, start REAL, stop REAL, category TEXT, source TEXT)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS spans_video ON spans (video)")
+            db.execute("CREATE TABLE IF NOT EXISTS channels (video TEXT PRIMARY KEY, channel TEXT)")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS edges (channel TEXT, position TEXT, video TEXT, "
+                "tokens TEXT, PRIMARY KEY (channel, position, video))"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def spans(self, video_id: str) -> List[Span]:
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT start, stop FROM spans WHERE video = ?", (video_id,)
+            ).fetchall()
+        return merge_spans(rows)
+
+    def import_rows(
+        self,
+        rows: Iterable[Tuple[str, float, float, str]],
+        source: str = "dump",
+        refresh: Iterable[str] = (),
+    ) -> Dict[str, int]:
+        """
+        Refresh from `rows`: every video they mention, and every video in
+        `refresh` (read after `rows` is consumed, so it can be the `seen`
+        set of `read_dump`), has its earlier spans from `source` replaced.
+        A video whose segments were all hidden or downvoted since the last
+        dump thus loses them. Other videos keep theirs.
+        """
+        by_video: Dict[str, List[Tuple[float, float, str]]] = {}
+        for video, start, end, category in rows:
+            by_video.setdefault(video, []).append((start, end, category))
+        with self._lock, self._connect() as db:
+            db.executemany(
+                "DELETE FROM spans WHERE video = ? AND source = ?",
+                [(video, source) for video in set(by_video) | set(refresh)],
+            )
+            db.executemany(
+                "INSERT INTO spans (video, start, stop, category, source) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (video, start, end, category, source)
+                    for video, spans in by_video.items()
+                    for start, end, category in spans
+                ],
+            )
+        return {"videos": len(by_video), "spans": sum(map(len, by_video.values()))}
+
+    def channel(self, video_id: str) -> str | None:
+        with self._connect() as db:
+            row = db.execute("SELECT channel FROM channels WHERE video = ?", (video_id,)).fetchone()
+        return row[0] if row else None
+
+    def set_channel(self, video_id: str, channel_id: str) -> None:
+        with self._connect() as db:
+            db.execute("INSERT OR REPLACE INTO channels VALUES (?, ?)", (video_id, channel_id))
+
+    def has_edges(self, channel_id: str) -> bool:
+        """Whether earlier episodes of the channel left intros/outros to match against."""
+        with self._connect() as db:
+            row = db.execute("SELECT 1 FROM edges WHERE channel = ? LIMIT 1", (channel_id,))
+            return row.fetchone() is not None
+
+    @staticmethod
+    def _edge_regions(words: list) -> Dict[str, list]:
+        duration = words[-1].end
+        return {
+            "intro": [w for w in words if w.start < EDGE_S],
+            "outro": [w for w in words if w.start >= max(duration - EDGE_S, EDGE_S)],
+        }
+
+    def recurring_spans(self, channel_id: str, video_id: str, words: list) -> List[Span]:
+        """
+        Spans near the start/end of `words` that also open/close earlier
+        episodes of the channel (aligned by words, so re-timed per episode).
+        This episode's edges are remembered for the next ones.
+        """
+        if not words:
+            return []
+        found: List[Span] = []
+        for position, region in self._edge_regions(words).items():
+            if not region:
+                continue
+            tokens = [normalize(w.text) for w in region]
+            with self._connect() as db:
+                others = db.execute(
+                    "SELECT tokens FROM edges WHERE channel = ? AND position = ? AND video != ?",
+                    (channel_id, position, video_id),
+                ).fetchall()
+            for (stored,) in others:
+                for start, end, _ in align(tokens, json.loads(stored), MIN_RECURRING_WORDS):
+                    found.append((region[start].start, region[end - 1].end))
+            self._remember(channel_id, position, video_id, tokens)
+        return merge_spans(found)
+
+    def remember_edges(self, channel_id: str, video_id: str, words: list) -> None:
+        """Remember this episode's edges without matching (see `recurring_spans`)."""
+        if not words:
+            return
+        for position, region in self._edge_regions(words).items():
+            if region:
+                self._remember(channel_id, position, video_id, [normalize(w.text) for w in region])
+
+    def _remember(self, channel_id: str, position: str, video_id: str, tokens: List[str]) -> None:
+        with self._lock, self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO edges VALUES (?, ?, ?, ?)",
+                (channel_id, position, video_id, json.dumps(tokens)),
+            )
+            db.execute(
+                "DELETE FROM edges WHERE channel = ? AND position = ? AND rowid NOT IN "
+                "(SELECT rowid FROM edges WHERE channel = ? AND position = ? "
+                "ORDER BY rowid DESC LIMIT ?)",
+                (channel_id, position, channel_id, position, KEEP_EPISODES),
+            )
+
+
+def known_skip_spans(
+    index: SkipIndex, video_id: str | None, channel_id: str | None, words: list
+) -> List[Span]:
+    """Imported spans for the video plus detected recurring intros/outros of its channel."""
+    spans: List[Span] = []
+    try:
+        if video_id:
+            spans += index.spans(video_id)
+        if channel_id and video_id:
+            spans += index.recurring_spans(channel_id, video_id, words)
+    except Exception as e:  # skipping is an optimisation, never a failure
+        print(f"Skip-span lookup failed: {e!r}")
+    spans = merge_spans(spans)
+    if spans:
+        print(f"Skipping {sum(e - s for s, e in spans):.1f}s in {len(spans)} known spans: {spans}")
+    return spans
+
+
+_index: SkipIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_skip_index() -> SkipIndex:
+    """Process-wide index at TLDR_SKIP_INDEX (default ~/.cache/tldr-tube/skip_spans.sqlite)."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SkipIndex(os.getenv("TLDR_SKIP_INDEX", str(DEFAULT_PATH)))
+        return _index
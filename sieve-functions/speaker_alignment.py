@@ -0,0 +1,115 @@
+import heapq
+import re
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+Turn = Tuple[float, float, str]  # (start, end, speaker_id)
+
+# first words that usually open a question when they start a turn
+_QUESTION_OPENERS = {
+    "what", "why", "how", "when", "where", "who", "which", "whose",
+    "do", "does", "did", "is", "are", "was", "were", "can", "could",
+    "would", "should", "will", "have", "has", "tell",
+}
+
+# phrases hosts use to run the show / address the guest
+_ADDRESS_TERMS = [
+    "welcome to", "welcome back", "my guest", "our guest", "joining me",
+    "joining us", "thanks for coming", "thank you for coming",
+    "thanks for joining", "thank you for joining", "thanks for having",
+    "today we have", "today i'm talking", "on the show", "this episode",
+    "the podcast", "subscribe", "let's get into", "before we get into",
+]
+
+_WORD = re.compile(r"[a-z']+")
+
+
+def merge_turns(speakers: Dict[str, Sequence[Tuple[float, float]]]) -> List[Turn]:
+    """k-way merge of per-speaker (chronological) turn lists into one timeline."""
+    streams = [
+        [(start, end, speaker_id) for start, end in segs]
+        for speaker_id, segs in speakers.items()
+    ]
+    return list(heapq.merge(*streams))
+
+
+def align_words_to_speakers(words: Sequence, turns: Sequence[Turn]) -> List[str | None]:
+    """
+    Attribute each word cue (sorted by start, as `load_subtitles_json3`
+    returns them) to the speaker whose turn contains the word's midpoint.
+
+    Both inputs are walked once with a forward-only pointer, so this is
+    O(len(words) + len(turns)). Words falling between turns get None.
+    """
+    labels: List[str | None] = []
+    j = 0
+    for word in words:
+        mid = (word.start + word.end) / 2
+        # turns ending before this word can't contain any later word either
+        while j < len(turns) and turns[j][1] <= mid:
+            j += 1
+        if j < len(turns) and turns[j][0] <= mid:
+            labels.append(turns[j][2])
+        else:
+            labels.append(None)
+    return labels
+
+
+def speaker_transcripts(words: Sequence, labels: Sequence[str | None]) -> Dict[str, List[str]]:
+    """Per-speaker word lists, in timeline order."""
+    out: Dict[str, List[str]] = {}
+    for word, speaker_id in zip(words, labels):
+        if speaker_id is not None:
+            out.setdefault(speaker_id, []).append(word.text)
+    return out
+
+
+def _speaker_runs(words: Sequence, labels: Sequence[str | None]) -> Iterable[Tuple[str, List[str]]]:
+    """Consecutive words by the same speaker, i.e. transcript-level turns."""
+    run: List[str] = []
+    current = None
+    for word, speaker_id in zip(words, labels):
+        if speaker_id != current and run:
+            if current is not None:
+                yield current, run
+            run = []
+        current = speaker_id
+        run.append(word.text)
+    if run and current is not None:
+        yield current, run
+
+
+def host_scores(words: Sequence, labels: Sequence[str | None]) -> Dict[str, float]:
+    """
+    Score how host-like each speaker's words are: questions asked per turn
+    (explicit "?" or a question opener at the start of a turn) plus
+    show-running / guest-addressing phrases per 100 words.
+    """
+    turns: Dict[str, int] = {}
+    questions: Dict[str, int] = {}
+    for speaker_id, run in _speaker_runs(words, labels):
+        turns[speaker_id] = turns.get(speaker_id, 0) + 1
+        first = _WORD.findall(run[0].lower())
+        asked = any(w.endswith("?") for w in run) or bool(first and first[0] in _QUESTION_OPENERS)
+        questions[speaker_id] = questions.get(speaker_id, 0) + asked
+
+    scores: Dict[str, float] = {}
+    for speaker_id, spoken in speaker_transcripts(words, labels).items():
+        text = " ".join(spoken).lower()
+        address = sum(text.count(term) for term in _ADDRESS_TERMS)
+        question_rate = questions.get(speaker_id, 0) / max(turns.get(speaker_id, 1), 1)
+        address_rate = 100 * address / max(len(spoken), 1)
+        scores[speaker_id] = question_rate + address_rate
+    return scores
+
+
+def pick_host_by_text(scores: Dict[str, float], margin: float = 1.25) -> str | None:
+    """The top-scoring speaker, if they beat the runner-up by `margin`×."""
+    if not scores:
+        return None
+    ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+    if len(ranked) == 1:
+        return ranked[0][0]
+    (best, best_score), (_, second) = ranked[0], ranked[1]
+    if best_score > 0 and best_score >= margin * second:
+        return best
+    return None
@@ -0,0 +1,45 @@
+import random
+import struct
+import wave
+
+from audio_preprocess import TimelineMap, cut_to_spans
+
+RATE = 16000
+
+
+def _write_ramp(path, n_samples):
+    # every sample stores its own index (mod 2**15), so positions can be checked
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(RATE)
+        wav.writeframes(struct.pack(f"<{n_samples}h", *(i % 32768 for i in range(n_samples))))
+
+
+def _read(path):
+    with wave.open(str(path), "rb") as wav:
+        frames = wav.readframes(wav.getnframes())
+    return struct.unpack(f"<{len(frames) // 2}h", frames)
+
+
+def test_cut_offsets_round_trip(tmp_path):
+    rng = random.Random(0)
+    duration = 600.0
+    _write_ramp(tmp_path / "src.wav", int(duration * RATE))
+
+    # hundreds of spans at arbitrary (non-sample-aligned) times
+    cursor, spans = 0.0, []
+    while cursor < duration - 1:
+        start = cursor + rng.uniform(0.05, 1.0)
+        end = min(start + rng.uniform(0.01, 2.0), duration)
+        spans.append((start, end))
+        cursor = end
+    _, written = cut_to_spans(str(tmp_path / "src.wav"), str(tmp_path / "cut.wav"), spans)
+    timeline = TimelineMap(written)
+    trimmed = _read(tmp_path / "cut.wav")
+
+    assert len(trimmed) == round(timeline.duration * RATE)
+    for i in rng.sample(range(len(trimmed)), 2000):
+        original = round(timeline.to_original(i / RATE) * RATE)
+        assert trimmed[i] == original % 32768
+        assert round(timeline.to_trimmed(original / RATE) * RATE) == i
@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import functools
+import json
+import os
+import tempfile
+import threading
+import wave
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Sequence, Tuple
+
+from artifact_store import atomic_write
+from audio_preprocess import resample_mono_16k
+
+if TYPE_CHECKING:
+    import numpy as np
+
+SAMPLE_RATE = 16000
+_FRAME = 400  # 25 ms
+_HOP = 160  # 10 ms
+_N_FFT = 512
+_N_BANDS = 40
+_N_CEPS = 20
+
+DEFAULT_REGISTRY = Path.home() / ".cache" / "tldr-tube" / "hosts.json"
+
+
+def _mel_filterbank() -> np.ndarray:
+    import numpy as np
+
+    def hz_to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def mel_to_hz(mel):
+        return 700.0 * (10 ** (mel / 2595.0) - 1.0)
+
+    mels = np.linspace(hz_to_mel(60.0), hz_to_mel(SAMPLE_RATE / 2), _N_BANDS + 2)
+    bins = np.floor((_N_FFT + 1) * mel_to_hz(mels) / SAMPLE_RATE).astype(int)
+    bank = np.zeros((_N_BANDS, _N_FFT // 2 + 1), dtype=np.float32)
+    for i in range(_N_BANDS):
+        lo, mid, hi = bins[i], bins[i + 1], bins[i + 2]
+        if mid > lo:
+            bank[i, lo:mid] = (np.arange(lo, mid) - lo) / (mid - lo)
+        if hi > mid:
+            bank[i, mid:hi] = (hi - np.arange(mid, hi)) / (hi - mid)
+    return bank
+
+
+@functools.lru_cache(maxsize=None)
+def _tables() -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Mel filterbank, analysis window and DCT, built on first use (numpy is deferred)."""
+    import numpy as np
+
+    window = np.hanning(_FRAME).astype(np.float32)
+    # DCT-II rows 1.._N_CEPS-1: log-mel → MFCCs without c0 (overall loudness)
+    dct = np.cos(
+        np.pi * np.arange(1, _N_CEPS)[:, None] * (2 * np.arange(_N_BANDS) + 1) / (2 * _N_BANDS)
+    ).astype(np.float32)
+    return _mel_filterbank(), window, dct
+
+
+def ensure_pcm16k(path: str, workdir: str | None = None) -> str:
+    """Path to a 16 kHz mono 16-bit WAV of `path`, resampling through ffmpeg if needed."""
+    with wave.open(path, "rb") as wav:
+        if (
+            wav.getframerate() == SAMPLE_RATE
+            and wav.getnchannels() == 1
+            and wav.getsampwidth() == 2
+        ):
+            return path
+    workdir = workdir or tempfile.mkdtemp(prefix="voiceprint-")
+    return resample_mono_16k(path, str(Path(workdir) / "mono16k.wav"))
+
+
+def _read_span(wav: wave.Wave_read, start: float, end: float) -> np.ndarray:
+    import numpy as np
+
+    first = max(0, int(start * SAMPLE_RATE))
+    wav.setpos(min(first, wav.getnframes()))
+    raw = wav.readframes(max(0, int(end * SAMPLE_RATE) - first))
+    return np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def spectral_embedding(samples: np.ndarray) -> np.ndarray | None:
+    """
+    Lightweight voiceprint: mean and std of the MFCCs over the voiced
+    frames, L2-normalised. Crude next to a neural speaker model, but cheap
+    and stable enough to tell the same host apart from their guests.
+    """
+    import numpy as np
+
+    if len(samples) < _FRAME * 10:
+        return None
+    bank, window, dct = _tables()
+    n_frames = 1 + (len(samples) - _FRAME) // _HOP
+    idx = np.arange(_FRAME)[None, :] + _HOP * np.arange(n_frames)[:, None]
+    frames = samples[idx] * window
+    power = np.abs(np.fft.rfft(frames, n=_N_FFT, axis=1)) ** 2
+    logmel = np.log(power @ bank.T + 1e-8)
+
+    # keep voiced frames only: the loudest half
+    energy = logmel.mean(axis=1)
+    mfcc = logmel[energy >= np.median(energy)] @ dct.T
+
+    vec = np.concatenate([mfcc.mean(axis=0), mfcc.std(axis=0)])
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm > 0 else None
+
+
+def speaker_embeddings(
+    wav_path: str,
+    speakers: Dict[str, Sequence[Tuple[float, float]]],
+    max_seconds: float = 60.0,
+) -> Dict[str, np.ndarray]:
+    """
+    One embedding per speaker from (up to `max_seconds` of) their longest
+    turns. `wav_path` must be 16 kHz mono (see `ensure_pcm16k`); only the
+    selected turns are read from disk.
+    """
+    import numpy as np
+
+    out: Dict[str, np.ndarray] = {}
+    with wave.open(wav_path, "rb") as wav:
+        for speaker_id, segs in speakers.items():
+            chunks: List[np.ndarray] = []
+            taken = 0.0
+            for start, end in sorted(segs, key=lambda x: x[1] - x[0], reverse=True):
+                if taken >= max_seconds:
+                    break
+                chunks.append(_read_span(wav, start, end))
+                taken += end - start
+            if chunks:
+                emb = spectral_embedding(np.concatenate(chunks))
+                if emb is not None:
+                    out[speaker_id] = emb
+    return out
+
+
+class HostRegistry:
+    """
+    Known hosts of recurring shows, keyed by YouTube channel ID.
+
+    Each entry keeps a running-mean voiceprint of the host and the
+    host-only opening (time until anyone else first speaks) of the last
+    few enrolled episodes; `intro_skip` turns those into a skippable intro
+    once enough episodes agree.
+    """
+
+    def __init__(self, path: str | Path = DEFAULT_REGISTRY):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        try:
+            self._entries = json.loads(self.path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._entries = {}
+
+    def get(self, channel_id: str) -> dict | None:
+        return self._entries.get(channel_id)
+
+    def match(
+        self,
+        channel_id: str,
+        embeddings: Dict[str, np.ndarray],
+        threshold: float = 0.85,
+        margin: float = 0.05,
+    ) -> Tuple[str | None, float]:
+        """
+        Speaker whose voiceprint is closest to the channel's host, if the
+        cosine similarity is above `threshold` and beats the runner-up by
+        `margin`; otherwise (None, best similarity).
+        """
+        import numpy as np
+
+        entry = self.get(channel_id)
+        if entry is None or not embeddings:
+            return None, 0.0
+        ids = list(embeddings)
+        matrix = np.stack([embeddings[i] for i in ids])  # rows are unit vectors
+        host = np.asarray(entry["embedding"], dtype=np.float32)
+        sims = matrix @ (host / np.linalg.norm(host))
+        order = np.argsort(sims)[::-1]
+        best = int(order[0])
+        runner_up = sims[order[1]] if len(order) > 1 else -1.0
+        if sims[best] < threshold or sims[best] - runner_up < margin:
+            return None, float(sims[best])
+        return ids[best], float(sims[best])
+
+    def similarity(self, channel_id: str, embedding: np.ndarray) -> float:
+        """Cosine similarity of a (unit) voiceprint to the channel's host, 0 if unknown."""
+        import numpy as np
+
+        entry = self.get(channel_id)
+        if entry is None:
+            return 0.0
+        host = np.asarray(entry["embedding"], dtype=np.float32)
+        return float(embedding @ (host / np.linalg.norm(host)))
+
+    def intro_skip(
+        self, channel_id: str, min_episodes: int = 3, tolerance_s: float = 5.0
+    ) -> float:
+        """
+        Host-only intro to skip: the shortest of the last `min_episodes`
+        openings if they agree within `tolerance_s`, else 0.
+        """
+        intros = (self.get(channel_id) or {}).get("intros", [])[-min_episodes:]
+        if len(intros) < min_episodes or max(intros) - min(intros) > tolerance_s:
+            return 0.0
+        return min(intros)
+
+    def update(
+        self, channel_id: str, embedding: np.ndarray, intro_s: float, keep: int = 5
+    ) -> None:
+        """Enroll one episode whose host was identified with confidence."""
+        import numpy as np
+
+        with self._lock:
+            entry = self._entries.get(channel_id)
+            if entry is None:
+                entry = {"embedding": embedding.tolist(), "episodes": 1, "intros": [intro_s]}
+            else:
+                n = entry["episodes"]
+                mean = (np.asarray(entry["embedding"]) * n + embedding) / (n + 1)
+                entry = {
+                    "embedding": (mean / np.linalg.norm(mean)).tolist(),
+                    "episodes": n + 1,
+                    "intros": (entry.get("intros", []) + [intro_s])[-keep:],
+                }
+            self._entries[channel_id] = entry
+            data = json.dumps(self._entries).encode("utf-8")
+            atomic_write(self.path, lambda fh: fh.write(data))
+
+
+_registry: HostRegistry | None = None
+
+
+def get_host_registry() -> HostRegistry:
+    """Process-wide registry at TLDR_HOST_REGISTRY (default ~/.cache/tldr-tube/hosts.json)."""
+    global _registry
+    if _registry is None:
+        _registry = HostRegistry(os.getenv("TLDR_HOST_REGISTRY", str(DEFAULT_REGISTRY)))
+    return _registry